@@ -0,0 +1,106 @@
+"""
+Compare the ingest throughput of `POST /intervals/batch` with that of
+looping over `POST /intervals`, against a file-backed SQLite database.
+
+Usage (from the root of the repository):
+    $ python -m benchmarks.bench_batch_create [--intervals N] [--batch-size M]
+"""
+import argparse
+import base64
+import datetime
+import json
+import os
+import tempfile
+import time
+
+os.environ.setdefault("SECRET_KEY", "benchmarks")
+
+from goal_tracker import create_app, db  # noqa: E402
+
+
+def build_payloads(n):
+    start = datetime.datetime(2021, 1, 1)
+    payloads = []
+    for i in range(n):
+        s = start + datetime.timedelta(hours=i)
+        payloads.append(
+            {
+                "goal_id": 1,
+                "start": s.strftime("%Y-%m-%d %H:%M"),
+                "final": (s + datetime.timedelta(minutes=30)).strftime(
+                    "%Y-%m-%d %H:%M"
+                ),
+            }
+        )
+    return payloads
+
+
+def set_up(client):
+    headers = {"Content-Type": "application/json"}
+    client.post(
+        "/api/v1.0/users",
+        data=json.dumps({"email": "a@example.com", "password": "123456"}),
+        headers=headers,
+    )
+    basic = base64.b64encode(b"a@example.com:123456").decode("utf-8")
+    rv = client.post("/api/v1.0/tokens", headers={"Authorization": f"Basic {basic}"})
+    headers["Authorization"] = f"Bearer {rv.get_json()['token']}"
+    client.post(
+        "/api/v1.0/goals", data=json.dumps({"description": "goal"}), headers=headers
+    )
+    return headers
+
+
+def ingest_one_by_one(client, headers, payloads):
+    for payload in payloads:
+        rv = client.post(
+            "/api/v1.0/intervals", data=json.dumps(payload), headers=headers
+        )
+        assert rv.status_code == 201, rv.get_data(as_text=True)
+
+
+def ingest_in_batches(client, headers, payloads, batch_size):
+    for i in range(0, len(payloads), batch_size):
+        rv = client.post(
+            "/api/v1.0/intervals/batch",
+            data=json.dumps({"intervals": payloads[i : i + batch_size]}),
+            headers=headers,
+        )
+        assert rv.status_code == 201, rv.get_data(as_text=True)
+
+
+def run(ingest, n_intervals, *args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app = create_app("testing")
+        app.config["SQLALCHEMY_DATABASE_URI"] = (
+            f"sqlite:///{os.path.join(tmp_dir, 'benchmark.db')}"
+        )
+        with app.app_context():
+            db.create_all()
+            client = app.test_client()
+            headers = set_up(client)
+
+            t0 = time.perf_counter()
+            ingest(client, headers, build_payloads(n_intervals), *args)
+            duration = time.perf_counter() - t0
+
+            db.session.remove()
+            db.engine.dispose()
+    return n_intervals / duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--intervals", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    one_by_one = run(ingest_one_by_one, args.intervals)
+    batched = run(ingest_in_batches, args.intervals, args.batch_size)
+    print(f"POST /intervals:       {one_by_one:10.0f} intervals/s")
+    print(f"POST /intervals/batch: {batched:10.0f} intervals/s")
+    print(f"speedup:               {batched / one_by_one:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
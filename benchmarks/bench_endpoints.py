@@ -0,0 +1,450 @@
+"""
+Time every endpoint of the API through the Flask test client, against a
+file-backed SQLite database holding a synthetic dataset (see `datasets`).
+
+For each scenario, the p50/p95/p99 latencies and the mean number of SQL
+statements per request are reported. The results can be written to a JSON file,
+and compared with a previously saved one (in which case the exit status is 1
+if any scenario has regressed).
+
+Notes:
+- The app is built by `create_app("testing")`, so passwords are hashed with
+  the (cheap) testing policy.
+- The response cache is disabled unless `--response-cache` is passed, so that
+  GET requests measure the handlers rather than the cache.
+
+Usage (from the root of the repository):
+    $ python -m benchmarks.bench_endpoints [--users N] [--goals M] [--intervals K]
+        [--requests R] [--output results.json]
+        [--compare baseline.json] [--threshold 0.25]
+"""
+import argparse
+import base64
+import collections
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SECRET_KEY", "benchmarks")
+
+from sqlalchemy import event  # noqa: E402
+
+from goal_tracker import create_app, db  # noqa: E402
+from goal_tracker.api import api_bp  # noqa: E402
+from goal_tracker.models import User  # noqa: E402
+
+from benchmarks import datasets  # noqa: E402
+
+
+Scenario = collections.namedtuple("Scenario", ["name", "endpoint", "prepare"])
+
+# Timestamps, at which the benchmarked writes create intervals
+# (well after the synthetic dataset's timelines end).
+FUTURE_START = datetime.datetime(2100, 1, 1)
+
+
+class Context(object):
+    """The state, which the scenarios share (and update as they go along)."""
+
+    def __init__(self, client, goals_per_user):
+        self.client = client
+        self.user_id = 1
+        self.first_goal_id = 1
+        self.second_goal_id = 2 if goals_per_user > 1 else 1
+        self.counter = 0
+
+        self.basic_auth = _basic_auth(datasets.email_for(1), datasets.PASSWORD)
+        rv = client.post("/api/v1.0/tokens", headers=self.basic_auth)
+        self.token_auth = {"Authorization": f"Bearer {rv.get_json()['token']}"}
+        self.refresh_auth = {
+            "Authorization": f"Bearer {rv.get_json()['refresh_token']}"
+        }
+
+        rv = self.request("GET", "/api/v1.0/intervals?per_page=20")
+        self.interval_ids = [i["id"] for i in rv.get_json()["items"]]
+
+    def unique(self):
+        self.counter += 1
+        return self.counter
+
+    def future_interval(self):
+        start = FUTURE_START + datetime.timedelta(hours=self.unique())
+        return {
+            "goal_id": self.first_goal_id,
+            "start": start.strftime("%Y-%m-%d %H:%M"),
+            "final": (start + datetime.timedelta(minutes=30)).strftime(
+                "%Y-%m-%d %H:%M"
+            ),
+        }
+
+    def request(self, method, url, body=None, headers=None):
+        rv = self.client.open(url, method=method, **self.kwargs(body, headers))
+        db.session.remove()
+        assert 200 <= rv.status_code < 300, (method, url, rv.get_data(as_text=True))
+        return rv
+
+    def kwargs(self, body=None, headers=None):
+        kwargs = {"headers": dict(self.token_auth if headers is None else headers)}
+        if body is not None:
+            kwargs["data"] = json.dumps(body)
+            kwargs["headers"]["Content-Type"] = "application/json"
+        return kwargs
+
+
+def _basic_auth(email, password):
+    credentials = base64.b64encode(f"{email}:{password}".encode("utf-8"))
+    return {"Authorization": f"Basic {credentials.decode('utf-8')}"}
+
+
+# Each `prepare` function runs untimed, and returns the arguments of the
+# (timed) request: (method, url, kwargs for `client.open`).
+
+
+def prepare_create_user(ctx):
+    body = {"email": f"new{ctx.unique()}@example.com", "password": "123456"}
+    return "POST", "/api/v1.0/users", ctx.kwargs(body, headers={})
+
+
+def prepare_edit_user(ctx):
+    # Edit a throwaway user, so that the credentials of user 1 stay valid.
+    user_id, email = _throwaway_user(ctx)
+    body = {"email": f"edited{ctx.unique()}@example.com"}
+    headers = _basic_auth(email, datasets.PASSWORD)
+    return "PUT", f"/api/v1.0/users/{user_id}", ctx.kwargs(body, headers)
+
+
+def prepare_delete_user(ctx):
+    user_id, email = _throwaway_user(ctx)
+    headers = _basic_auth(email, datasets.PASSWORD)
+    return "DELETE", f"/api/v1.0/users/{user_id}", ctx.kwargs(headers=headers)
+
+
+def _throwaway_user(ctx):
+    email = f"throwaway{ctx.unique()}@example.com"
+    user = User(email=email)
+    user.set_password_hash(datasets.PASSWORD)
+    db.session.add(user)
+    db.session.commit()
+    user_id = user.id
+    db.session.remove()
+    return user_id, email
+
+
+def prepare_revoke_refresh_token(ctx):
+    rv = ctx.request("POST", "/api/v1.0/tokens", headers=ctx.basic_auth)
+    headers = {"Authorization": f"Bearer {rv.get_json()['refresh_token']}"}
+    return "DELETE", "/api/v1.0/tokens/refresh", ctx.kwargs(headers=headers)
+
+
+def prepare_delete_goal(ctx):
+    rv = ctx.request("POST", "/api/v1.0/goals", {"description": f"d{ctx.unique()}"})
+    return "DELETE", f"/api/v1.0/goals/{rv.get_json()['id']}", ctx.kwargs()
+
+
+def prepare_delete_interval(ctx):
+    rv = ctx.request("POST", "/api/v1.0/intervals", ctx.future_interval())
+    return "DELETE", f"/api/v1.0/intervals/{rv.get_json()['id']}", ctx.kwargs()
+
+
+def prepare_delete_intervals(ctx):
+    body = {"intervals": [ctx.future_interval() for __ in range(10)]}
+    rv = ctx.request("POST", "/api/v1.0/intervals/batch", body)
+    ids = [result["interval"]["id"] for result in rv.get_json()["results"]]
+    return "DELETE", "/api/v1.0/intervals/batch", ctx.kwargs({"ids": ids})
+
+
+def prepare_edit_interval(ctx):
+    # Move the same interval back and forth between two goals.
+    goal_id = ctx.first_goal_id if ctx.unique() % 2 else ctx.second_goal_id
+    url = f"/api/v1.0/intervals/{ctx.interval_ids[-1]}"
+    return "PUT", url, ctx.kwargs({"goal_id": goal_id})
+
+
+def prepare_edit_intervals(ctx):
+    # Move the same intervals back and forth between two goals.
+    goal_id = ctx.first_goal_id if ctx.unique() % 2 else ctx.second_goal_id
+    body = {"ids": ctx.interval_ids[:10], "set": {"goal_id": goal_id}}
+    return "PUT", "/api/v1.0/intervals/batch", ctx.kwargs(body)
+
+
+def get(url, headers=None):
+    def prepare(ctx):
+        return "GET", url, ctx.kwargs(headers=headers)
+
+    return prepare
+
+
+SCENARIOS = [
+    Scenario("GET /users", "get_users", get("/api/v1.0/users", headers={})),
+    Scenario("GET /users/<id>", "get_user", get("/api/v1.0/users/1", headers={})),
+    Scenario("POST /users", "create_user", prepare_create_user),
+    Scenario("PUT /users/<id>", "edit_user", prepare_edit_user),
+    Scenario("DELETE /users/<id>", "delete_user", prepare_delete_user),
+    Scenario("GET /user", "get_user_details", get("/api/v1.0/user")),
+    Scenario(
+        "POST /tokens",
+        "create_token",
+        lambda ctx: ("POST", "/api/v1.0/tokens", ctx.kwargs(headers=ctx.basic_auth)),
+    ),
+    Scenario(
+        "POST /tokens/refresh",
+        "refresh_access_token",
+        lambda ctx: (
+            "POST",
+            "/api/v1.0/tokens/refresh",
+            ctx.kwargs(headers=ctx.refresh_auth),
+        ),
+    ),
+    Scenario(
+        "DELETE /tokens/refresh", "revoke_refresh_token", prepare_revoke_refresh_token
+    ),
+    Scenario("GET /goals", "get_goals", get("/api/v1.0/goals")),
+    Scenario("GET /goals/<id>", "get_goal", get("/api/v1.0/goals/1")),
+    Scenario(
+        "POST /goals",
+        "create_goal",
+        lambda ctx: (
+            "POST",
+            "/api/v1.0/goals",
+            ctx.kwargs({"description": f"c{ctx.unique()}"}),
+        ),
+    ),
+    Scenario(
+        "PUT /goals/<id>",
+        "edit_goal",
+        lambda ctx: (
+            "PUT",
+            f"/api/v1.0/goals/{ctx.first_goal_id}",
+            ctx.kwargs({"description": f"e{ctx.unique()}"}),
+        ),
+    ),
+    Scenario("DELETE /goals/<id>", "delete_goal", prepare_delete_goal),
+    Scenario("GET /intervals", "get_intervals", get("/api/v1.0/intervals")),
+    Scenario(
+        "GET /intervals (page 50)",
+        "get_intervals",
+        get("/api/v1.0/intervals?page=50&per_page=10"),
+    ),
+    Scenario(
+        "GET /intervals (keyset)",
+        "get_intervals",
+        get("/api/v1.0/intervals?after=&per_page=10&order=-start"),
+    ),
+    Scenario(
+        "GET /intervals (filtered)",
+        "get_intervals",
+        get("/api/v1.0/intervals?goal_id=1&from=2020-02-01 00:00&to=2020-03-01 00:00"),
+    ),
+    Scenario(
+        "GET /intervals/export",
+        "export_intervals",
+        get("/api/v1.0/intervals/export?format=ndjson"),
+    ),
+    Scenario(
+        "GET /intervals/<id>",
+        "get_interval",
+        lambda ctx: (
+            "GET",
+            f"/api/v1.0/intervals/{ctx.interval_ids[0]}",
+            ctx.kwargs(),
+        ),
+    ),
+    Scenario(
+        "POST /intervals",
+        "create_interval",
+        lambda ctx: ("POST", "/api/v1.0/intervals", ctx.kwargs(ctx.future_interval())),
+    ),
+    Scenario(
+        "POST /intervals/batch (100)",
+        "create_intervals",
+        lambda ctx: (
+            "POST",
+            "/api/v1.0/intervals/batch",
+            ctx.kwargs({"intervals": [ctx.future_interval() for __ in range(100)]}),
+        ),
+    ),
+    Scenario("PUT /intervals/<id>", "edit_interval", prepare_edit_interval),
+    Scenario("DELETE /intervals/<id>", "delete_interval", prepare_delete_interval),
+    Scenario("PUT /intervals/batch (10)", "edit_intervals", prepare_edit_intervals),
+    Scenario(
+        "DELETE /intervals/batch (10)", "delete_intervals", prepare_delete_intervals
+    ),
+    Scenario("GET /stats", "get_stats", get("/api/v1.0/stats?bucket=week")),
+    Scenario("GET /goals/<id>/stats", "get_goal_stats", get("/api/v1.0/goals/1/stats")),
+]
+
+
+def run_scenario(ctx, scenario, n_requests, query_counter):
+    durations = []
+    n_queries = 0
+    for __ in range(n_requests):
+        method, url, kwargs = scenario.prepare(ctx)
+
+        query_counter[0] = 0
+        t0 = time.perf_counter()
+        rv = ctx.client.open(url, method=method, **kwargs)
+        rv.get_data()  # Consume streamed responses, too.
+        durations.append(time.perf_counter() - t0)
+        n_queries += query_counter[0]
+
+        # The requests share the app context, which `run` has pushed,
+        # so the session (and its identity map) must be cleaned up explicitly.
+        db.session.remove()
+
+        assert 200 <= rv.status_code < 300, (
+            scenario.name,
+            rv.status_code,
+            rv.get_data(as_text=True),
+        )
+
+    durations.sort()
+    return {
+        "endpoint": scenario.endpoint,
+        "requests": n_requests,
+        "p50_ms": datasets.percentile(durations, 50) * 1000,
+        "p95_ms": datasets.percentile(durations, 95) * 1000,
+        "p99_ms": datasets.percentile(durations, 99) * 1000,
+        "queries_per_request": n_queries / n_requests,
+    }
+
+
+def run(args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app = create_app("testing")
+        app.config["SQLALCHEMY_DATABASE_URI"] = (
+            f"sqlite:///{os.path.join(tmp_dir, 'benchmark.db')}"
+        )
+        if not args.response_cache:
+            app.response_cache.maxsize = 0
+
+        with app.app_context():
+            dataset = datasets.populate(args.users, args.goals, args.intervals)
+
+            query_counter = [0]
+
+            def count_query(*__):
+                query_counter[0] += 1
+
+            event.listen(db.engine, "before_cursor_execute", count_query)
+
+            ctx = Context(app.test_client(), args.goals)
+            results = {}
+            for scenario in SCENARIOS:
+                results[scenario.name] = run_scenario(
+                    ctx, scenario, args.requests, query_counter
+                )
+
+            uncovered = _api_endpoints(app) - {s.endpoint for s in SCENARIOS}
+
+            event.remove(db.engine, "before_cursor_execute", count_query)
+            db.session.remove()
+            db.engine.dispose()
+
+    return {
+        "meta": {
+            "created_at": datetime.datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "dataset": dataset,
+            "requests_per_scenario": args.requests,
+            "response_cache": args.response_cache,
+        },
+        "results": results,
+    }, uncovered
+
+
+def _api_endpoints(app):
+    prefix = f"{api_bp.name}."
+    return {
+        rule.endpoint[len(prefix) :]
+        for rule in app.url_map.iter_rules()
+        if rule.endpoint.startswith(prefix)
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Returns:
+        (list): the names of the scenarios, which have regressed, i.e. whose
+            p50 or p95 latency has grown by more than `threshold` (a fraction),
+            or which issue more SQL statements per request than in the baseline
+    """
+    regressions = []
+    print()
+    print(f"{'scenario':<32} {'p50 [ms]':>18} {'p95 [ms]':>18} {'queries':>12}")
+    for name, result in results["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:<32} {'(not in baseline)':>18}")
+            continue
+
+        flags = []
+        for key in ("p50_ms", "p95_ms"):
+            if result[key] > base[key] * (1 + threshold):
+                flags.append(key[:3])
+        if result["queries_per_request"] > base["queries_per_request"]:
+            flags.append("queries")
+        if flags:
+            regressions.append(name)
+
+        print(
+            f"{name:<32}"
+            f" {base['p50_ms']:>8.2f} -> {result['p50_ms']:>6.2f}"
+            f" {base['p95_ms']:>8.2f} -> {result['p95_ms']:>6.2f}"
+            f" {base['queries_per_request']:>5.1f} ->"
+            f" {result['queries_per_request']:>4.1f}"
+            + (f"  REGRESSED ({', '.join(flags)})" if flags else "")
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--goals", type=int, default=10, help="goals per user")
+    parser.add_argument("--intervals", type=int, default=100, help="intervals per goal")
+    parser.add_argument("--requests", type=int, default=50, help="per scenario")
+    parser.add_argument("--response-cache", action="store_true")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="a JSON file with baseline results")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="the tolerated relative latency growth, when comparing",
+    )
+    args = parser.parse_args()
+
+    results, uncovered = run(args)
+
+    print(json.dumps(results["meta"]["dataset"]))
+    print(
+        f"{'scenario':<32} {'p50 [ms]':>9} {'p95 [ms]':>9} {'p99 [ms]':>9}"
+        f" {'queries':>8}"
+    )
+    for name, result in results["results"].items():
+        print(
+            f"{name:<32} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f}"
+            f" {result['p99_ms']:>9.2f} {result['queries_per_request']:>8.1f}"
+        )
+    if uncovered:
+        print(f"\nendpoints without a scenario: {', '.join(sorted(uncovered))}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} scenario(s) regressed")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
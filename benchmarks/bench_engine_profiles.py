@@ -0,0 +1,250 @@
+"""
+Measure the throughput of the API under concurrent threads, for each engine
+profile (see `goal_tracker.engines`), against a synthetic dataset (see `datasets`).
+
+Each thread acts on behalf of a different user, and sends a mix of
+`GET /goals`, `GET /intervals` and (with probability `--write-ratio`)
+`POST /intervals` requests through the Flask test client for `--seconds` seconds.
+For each profile and number of threads, the requests per second, the p50/p95
+latencies, the number of failed requests (e.g. "database is locked"), the number
+of database connections opened, and the peak usage of the connection pool
+are reported.
+
+Notes:
+- By default, a temporary SQLite database is used, and the "default" and "sqlite"
+  profiles are compared. With `--database-url mysql+pymysql://...`, the "default"
+  and "mysql" profiles are compared (and the database's tables are recreated!).
+- The response cache is disabled, so that the requests do reach the database.
+
+Usage (from the root of the repository):
+    $ python -m benchmarks.bench_engine_profiles [--users N] [--goals M]
+        [--intervals K] [--threads 1,4,16] [--seconds S] [--write-ratio W]
+        [--database-url URL] [--profiles default,sqlite]
+"""
+import argparse
+import base64
+import datetime
+import os
+import random
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("SECRET_KEY", "benchmarks")
+
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.engine.url import make_url  # noqa: E402
+
+from goal_tracker import create_app, db  # noqa: E402
+from goal_tracker.engines import pool_stats  # noqa: E402
+
+from benchmarks import datasets  # noqa: E402
+
+
+# Timestamps, at which the benchmarked writes create intervals
+# (well after the synthetic dataset's timelines end).
+FUTURE_START = datetime.datetime(2100, 1, 1)
+
+
+def make_app(database_url, profile):
+    app = create_app("testing")
+    app.config["SQLALCHEMY_DATABASE_URI"] = database_url
+    app.config["DATABASE_ENGINE_PROFILE"] = profile
+    app.response_cache.maxsize = 0
+    return app
+
+
+def get_tokens(app, n_users):
+    client = app.test_client()
+    tokens = []
+    for user_id in range(1, n_users + 1):
+        credentials = f"{datasets.email_for(user_id)}:{datasets.PASSWORD}"
+        rv = client.post(
+            "/api/v1.0/tokens",
+            headers={
+                "Authorization": "Basic "
+                + base64.b64encode(credentials.encode("utf-8")).decode("utf-8")
+            },
+        )
+        tokens.append(rv.get_json()["token"])
+    return tokens
+
+
+def worker(app, index, token, goal_id, write_ratio, deadline, results):
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {token}"}
+    rng = random.Random(index)
+    latencies = []
+    n_errors = 0
+    n_writes = 0
+
+    while time.perf_counter() < deadline:
+        if rng.random() < write_ratio:
+            # Every thread writes into a timeline of its own.
+            start = FUTURE_START + datetime.timedelta(
+                days=index * 10000, hours=n_writes
+            )
+            n_writes += 1
+            body = {
+                "goal_id": goal_id,
+                "start": start.strftime("%Y-%m-%d %H:%M"),
+                "final": (start + datetime.timedelta(minutes=30)).strftime(
+                    "%Y-%m-%d %H:%M"
+                ),
+            }
+            method, url, kwargs = "POST", "/api/v1.0/intervals", {"json": body}
+        elif rng.random() < 0.5:
+            method, url, kwargs = "GET", "/api/v1.0/goals", {}
+        else:
+            method, url, kwargs = "GET", "/api/v1.0/intervals?per_page=20", {}
+
+        t0 = time.perf_counter()
+        try:
+            rv = client.open(url, method=method, headers=headers, **kwargs)
+            rv.get_data()
+            failed = rv.status_code >= 400
+        except Exception:
+            failed = True
+        latencies.append(time.perf_counter() - t0)
+        n_errors += failed
+
+    results[index] = (latencies, n_errors)
+
+
+def run_profile(args, database_url, profile, tokens):
+    app = make_app(database_url, profile)
+    rows = []
+    with app.app_context():
+        engine = db.engine
+    n_connects = [0]
+
+    def count_connect(*__):
+        n_connects[0] += 1
+
+    event.listen(engine, "connect", count_connect)
+
+    for n_threads in args.threads:
+        n_connects[0] = 0
+        results = [None] * n_threads
+        deadline = time.perf_counter() + args.seconds
+        threads = [
+            threading.Thread(
+                target=worker,
+                args=(
+                    app,
+                    i,
+                    tokens[i % len(tokens)],
+                    # The first goal of the user, on whose behalf thread `i` acts.
+                    (i % len(tokens)) * args.goals + 1,
+                    args.write_ratio,
+                    deadline,
+                    results,
+                ),
+            )
+            for i in range(n_threads)
+        ]
+        peak_checked_out = 0
+        peak_overflow = 0
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            stats = pool_stats(engine)
+            peak_checked_out = max(peak_checked_out, stats.get("checked_out", 0))
+            peak_overflow = max(peak_overflow, stats.get("overflow", 0))
+            time.sleep(0.01)
+        for thread in threads:
+            thread.join()
+
+        latencies = sorted(
+            t for thread_latencies, __ in results for t in thread_latencies
+        )
+        stats = pool_stats(engine)
+        rows.append(
+            {
+                "profile": profile,
+                "pool": stats["pool"],
+                "threads": n_threads,
+                "requests_per_second": len(latencies) / args.seconds,
+                "p50_ms": datasets.percentile(latencies, 50) * 1000,
+                "p95_ms": datasets.percentile(latencies, 95) * 1000,
+                "errors": sum(n_errors for __, n_errors in results),
+                "connects": n_connects[0],
+                "peak_checked_out": peak_checked_out,
+                "peak_overflow": peak_overflow,
+            }
+        )
+
+    event.remove(engine, "connect", count_connect)
+    engine.dispose()
+    return rows
+
+
+def run(args, database_url):
+    profiles = args.profiles or [
+        "default",
+        "mysql" if make_url(database_url).get_backend_name() == "mysql" else "sqlite",
+    ]
+
+    # Populate the database (by means of the first profile's app),
+    # and log every user in once.
+    app = make_app(database_url, profiles[0])
+    with app.app_context():
+        dataset = datasets.populate(args.users, args.goals, args.intervals)
+        db.session.remove()
+        db.engine.dispose()
+    tokens = get_tokens(app, args.users)
+    print(f"dataset: {dataset}")
+
+    rows = []
+    for profile in profiles:
+        rows.extend(run_profile(args, database_url, profile, tokens))
+    return rows
+
+
+def report(rows):
+    print()
+    print(
+        f"{'profile':<10} {'pool':<10} {'threads':>7} {'req/s':>9} {'p50 [ms]':>9}"
+        f" {'p95 [ms]':>9} {'errors':>7} {'connects':>9} {'peak out':>9}"
+        f" {'overflow':>9}"
+    )
+    for row in rows:
+        print(
+            f"{row['profile']:<10} {row['pool']:<10} {row['threads']:>7}"
+            f" {row['requests_per_second']:>9.1f} {row['p50_ms']:>9.2f}"
+            f" {row['p95_ms']:>9.2f} {row['errors']:>7} {row['connects']:>9}"
+            f" {row['peak_checked_out']:>9} {row['peak_overflow']:>9}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=32)
+    parser.add_argument("--goals", type=int, default=5, help="per user")
+    parser.add_argument("--intervals", type=int, default=200, help="per goal")
+    parser.add_argument(
+        "--threads",
+        type=lambda value: [int(n) for n in value.split(",")],
+        default=[1, 4, 16],
+        help="comma-separated numbers of threads",
+    )
+    parser.add_argument("--seconds", type=float, default=3.0, help="per run")
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    parser.add_argument("--database-url", help="(default: a temporary SQLite file)")
+    parser.add_argument(
+        "--profiles",
+        type=lambda value: value.split(","),
+        help="comma-separated engine profiles (default: depends on the database)",
+    )
+    args = parser.parse_args()
+
+    if args.database_url is not None:
+        rows = run(args, args.database_url)
+    else:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            rows = run(args, f"sqlite:///{os.path.join(tmp_dir, 'benchmark.db')}")
+    report(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Compare two ways of scoping the query behind `GET /intervals` to one user:
+
+- "materialized": load all of the user's goals, collect their IDs in a list,
+  and filter the intervals by means of `goal_id IN (...)`;
+- "joined": `Interval.query_owned_by`, i.e. a single join with the goals table.
+
+Usage (from the root of the repository):
+    $ python -m benchmarks.bench_interval_listing [--repeat N]
+"""
+import argparse
+
+from goal_tracker import create_app, db
+from goal_tracker.models import Interval
+
+from benchmarks import datasets
+
+
+GOAL_COUNTS = (10, 1000, 10000)
+INTERVALS_PER_GOAL = 5
+PER_PAGE = 10
+
+
+def list_materialized(user):
+    goal_ids = [g.id for g in user.goals.all()]
+    query = Interval.query.filter(Interval.goal_id.in_(goal_ids))
+    return query.paginate(page=1, per_page=PER_PAGE, error_out=False).items
+
+
+def list_joined(user):
+    query = Interval.query_owned_by(user.id)
+    return query.paginate(page=1, per_page=PER_PAGE, error_out=False).items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    app = create_app("testing")
+    with app.app_context():
+        print(
+            f"{'goals':>8} {'materialized [ms]':>18} {'joined [ms]':>12}"
+            f" {'speedup':>8}"
+        )
+        for n_goals in GOAL_COUNTS:
+            datasets.populate(1, n_goals, INTERVALS_PER_GOAL)
+            materialized, __ = datasets.time_it(
+                list_materialized, repeat=args.repeat, setup=datasets.fresh_user
+            )
+            joined, __ = datasets.time_it(
+                list_joined, repeat=args.repeat, setup=datasets.fresh_user
+            )
+            print(
+                f"{n_goals:>8} {materialized * 1000:>18.2f} {joined * 1000:>12.2f}"
+                f" {materialized / joined:>7.1f}x"
+            )
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Time the query behind `GET /intervals?overlaps=<start>,<final>` against a large
+`intervals` table, in the following variants:
+
+- "scan": a linear scan over all of the user's intervals, held in memory;
+- "unbounded": the predicate `start < <final> AND final > <start>`, with only
+  the index on `intervals(goal_id, start)`;
+- "+ final index": the same predicate, with an index on `intervals(goal_id, final)`
+  as well;
+- "bounded": `Interval.overlaps`, which adds `start > <start> - MAX_DURATION`,
+  with only the index on `intervals(goal_id, start)`.
+
+Windows near the beginning, the middle and the end of the recorded history are
+queried. Each half of the unbounded predicate is selective only at one end of
+the history, and an index on either column can serve only one half. The bounded
+predicate turns the condition on "start" into a narrow range, which is
+selective everywhere.
+
+Usage (from the root of the repository):
+    $ python -m benchmarks.bench_overlaps [--intervals N] [--repeat M]
+"""
+import argparse
+
+from goal_tracker import create_app, db
+from goal_tracker.models import Interval
+
+from benchmarks import datasets
+
+
+N_GOALS = 10
+
+
+def windows(n_intervals):
+    for fraction in (0.01, 0.5, 0.99):
+        start = (
+            datasets.TIMELINE_START
+            + int(n_intervals * fraction) * datasets.INTERVAL_SPACING
+        )
+        yield fraction, start, start + Interval.MAX_DURATION
+
+
+def overlaps_scan(rows, start, final):
+    return [row for row in rows if row[1] < final and row[2] > start]
+
+
+def overlaps_unbounded(start, final):
+    return _overlapping(db.and_(Interval.start < final, Interval.final > start))
+
+
+def overlaps_bounded(start, final):
+    return _overlapping(Interval.overlaps(start, final))
+
+
+def _overlapping(condition):
+    return (
+        Interval.query_owned_by(1)
+        .filter(condition)
+        .with_entities(Interval.id, Interval.start, Interval.final)
+        .all()
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--intervals", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app("testing")
+    with app.app_context():
+        datasets.populate(1, N_GOALS, args.intervals // N_GOALS)
+        rows = (
+            Interval.query_owned_by(1)
+            .with_entities(Interval.id, Interval.start, Interval.final)
+            .all()
+        )
+        final_index = db.Index(
+            "ix_intervals_goal_id_final", Interval.goal_id, Interval.final
+        )
+
+        results = {}
+        for fraction, start, final in windows(args.intervals):
+            results[fraction] = [
+                datasets.time_it(overlaps_scan, rows, start, final, repeat=args.repeat),
+                datasets.time_it(overlaps_unbounded, start, final, repeat=args.repeat),
+                datasets.time_it(overlaps_bounded, start, final, repeat=args.repeat),
+            ]
+        final_index.create(db.engine)
+        for fraction, start, final in windows(args.intervals):
+            results[fraction].append(
+                datasets.time_it(overlaps_unbounded, start, final, repeat=args.repeat)
+            )
+        final_index.drop(db.engine)
+
+        print(f"{args.intervals} intervals, windows of 1 day")
+        print(
+            f"{'position':>8} {'matches':>8} {'scan [ms]':>10}"
+            f" {'unbounded [ms]':>15} {'+ final index [ms]':>19}"
+            f" {'bounded [ms]':>13}"
+        )
+        for fraction, timings in results.items():
+            (scan, matches), (unbounded, __), (bounded, __), (both, __) = timings
+            n_results = len(matches)
+            print(
+                f"{fraction:>8.0%} {n_results:>8} {scan * 1000:>10.2f}"
+                f" {unbounded * 1000:>15.2f} {both * 1000:>19.2f}"
+                f" {bounded * 1000:>13.2f}"
+            )
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
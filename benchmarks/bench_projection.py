@@ -0,0 +1,99 @@
+"""
+Compare two ways of fetching and serializing the rows behind the list endpoints:
+
+- "hydrated": load ORM instances (into the session's identity map),
+  and serialize them by means of `to_dict`;
+- "projected": select just the needed columns as tuples
+  (see `PaginatedAPIMixin.project`), and serialize those directly.
+
+Both latency and peak memory allocation (as traced by `tracemalloc`) are reported.
+
+Usage (from the root of the repository):
+    $ python -m benchmarks.bench_projection [--goals N] [--intervals M] [--repeat K]
+"""
+import argparse
+import statistics
+import tracemalloc
+
+from goal_tracker import create_app, db
+from goal_tracker.models import Goal, Interval
+
+from benchmarks import datasets
+
+
+ROW_COUNTS = (100, 1000, 10000)
+
+
+def goals_hydrated(user, __):
+    return [{"id": g.id, "description": g.description} for g in user.goals.all()]
+
+
+def goals_projected(user, __):
+    return [
+        {"id": g.id, "description": g.description}
+        for g in db.session.query(Goal.id, Goal.description).filter(
+            Goal.user_id == user.id
+        )
+    ]
+
+
+def intervals_hydrated(user, n_rows):
+    query = Interval.query_owned_by(user.id).order_by(Interval.start, Interval.id)
+    return [interval.to_dict() for interval in query.limit(n_rows)]
+
+
+def intervals_projected(user, n_rows):
+    query = Interval.query_owned_by(user.id).order_by(Interval.start, Interval.id)
+    query, serialize = Interval.project(query)
+    return [serialize(row) for row in query.limit(n_rows)]
+
+
+def measure(fn, n_rows, repeat):
+    duration, __ = datasets.time_it(
+        fn, n_rows, repeat=repeat, setup=datasets.fresh_user
+    )
+    peaks = []
+    for __ in range(repeat):
+        user = datasets.fresh_user()
+        tracemalloc.start()
+        fn(user, n_rows)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return duration, statistics.median(peaks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--goals", type=int, default=1000)
+    parser.add_argument("--intervals", type=int, default=max(ROW_COUNTS))
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    app = create_app("testing")
+    with app.app_context():
+        datasets.populate(1, args.goals, max(1, args.intervals // args.goals))
+
+        cases = [(f"goals ({args.goals})", goals_hydrated, goals_projected, None)]
+        cases.extend(
+            (f"intervals ({n_rows})", intervals_hydrated, intervals_projected, n_rows)
+            for n_rows in ROW_COUNTS
+            if n_rows <= args.intervals
+        )
+
+        print(
+            f"{'rows':<18} {'hydrated [ms]':>14} {'projected [ms]':>15}"
+            f" {'hydrated [KiB]':>15} {'projected [KiB]':>16}"
+        )
+        for label, hydrated, projected, n_rows in cases:
+            hydrated_time, hydrated_peak = measure(hydrated, n_rows, args.repeat)
+            projected_time, projected_peak = measure(projected, n_rows, args.repeat)
+            print(
+                f"{label:<18} {hydrated_time * 1000:>14.2f}"
+                f" {projected_time * 1000:>15.2f}"
+                f" {hydrated_peak / 1024:>15.0f} {projected_peak / 1024:>16.0f}"
+            )
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
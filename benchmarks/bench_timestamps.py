@@ -0,0 +1,62 @@
+"""
+Compare `goal_tracker.utils.parse_time` and `format_time` with the plain
+`datetime.strptime` and `datetime.strftime` calls, which they replace.
+
+Usage (from the root of the repository):
+    $ python -m benchmarks.bench_timestamps [--timestamps N] [--repeat M]
+"""
+import argparse
+import datetime
+import time
+
+from goal_tracker.utils import TIME_FORMAT, format_time, parse_time
+
+
+def build_timestamps(n):
+    start = datetime.datetime(2021, 1, 1)
+    return [start + datetime.timedelta(minutes=17 * i) for i in range(n)]
+
+
+def best_of(fn, values, repeat):
+    durations = []
+    for __ in range(repeat):
+        t0 = time.perf_counter()
+        for value in values:
+            fn(value)
+        durations.append(time.perf_counter() - t0)
+    return min(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--timestamps", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    timestamps = build_timestamps(args.timestamps)
+    strings = [dt.strftime(TIME_FORMAT) for dt in timestamps]
+    assert [parse_time(s) for s in strings] == timestamps
+    assert [format_time(dt) for dt in timestamps] == strings
+
+    cases = [
+        (
+            "parse",
+            lambda s: datetime.datetime.strptime(s, TIME_FORMAT),
+            parse_time,
+            strings,
+        ),
+        ("format", lambda dt: dt.strftime(TIME_FORMAT), format_time, timestamps),
+    ]
+    print(f"{args.timestamps} timestamps")
+    print(f"{'':<8} {'datetime [ms]':>14} {'utils [ms]':>11} {'speedup':>8}")
+    for label, baseline, fast, values in cases:
+        baseline_time = best_of(baseline, values, args.repeat)
+        fast_time = best_of(fast, values, args.repeat)
+        print(
+            f"{label:<8} {baseline_time * 1000:>14.1f} {fast_time * 1000:>11.1f}"
+            f" {baseline_time / fast_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Synthetic datasets (and the timing helpers) for the benchmarks.
+
+Every user `i` (counting from 1) has the email "user<i>@example.com" and the
+password `PASSWORD`, owns `goals_per_user` goals and has recorded
+`intervals_per_goal` intervals for each of them (in a single, non-overlapping
+timeline per user, whose `k`-th interval starts at
+`TIMELINE_START + k * INTERVAL_SPACING` and belongs to the user's goal
+`k % goals_per_user + 1`).
+"""
+import datetime
+import statistics
+import time
+
+from flask import current_app
+
+from goal_tracker import db
+from goal_tracker.models import Goal, Interval, User
+from goal_tracker.rollups import rebuild_daily_totals
+from goal_tracker.seed import ChunkedWriter
+
+
+PASSWORD = "benchmark"
+TIMELINE_START = datetime.datetime(2020, 1, 1, 6, 0)
+INTERVAL_LENGTH = datetime.timedelta(minutes=60)
+INTERVAL_SPACING = datetime.timedelta(minutes=90)
+
+
+def email_for(user_id):
+    return f"user{user_id}@example.com"
+
+
+def populate(n_users, goals_per_user, intervals_per_goal, chunk_size=10000):
+    """
+    (Re-)create all tables and fill them with a synthetic dataset
+    by means of chunked, multi-row INSERT statements.
+
+    Returns:
+        (dict): the number of rows inserted into each table
+    """
+    db.drop_all()
+    db.create_all()
+
+    writer = ChunkedWriter(
+        [User.__table__, Goal.__table__, Interval.__table__], chunk_size
+    )
+    # Hashing is deliberately slow, so hash the shared password only once.
+    password_hash = current_app.password_hasher.hash(PASSWORD)
+    for u in range(1, n_users + 1):
+        writer.add(
+            User.__table__,
+            {"id": u, "email": email_for(u), "password_hash": password_hash},
+        )
+    for u in range(1, n_users + 1):
+        for g in range(1, goals_per_user + 1):
+            writer.add(
+                Goal.__table__,
+                {
+                    "id": (u - 1) * goals_per_user + g,
+                    "user_id": u,
+                    "description": f"goal {g}",
+                },
+            )
+    intervals_per_user = goals_per_user * intervals_per_goal
+    for u in range(1, n_users + 1):
+        for k in range(intervals_per_user):
+            writer.add(
+                Interval.__table__,
+                {
+                    "goal_id": (u - 1) * goals_per_user + k % goals_per_user + 1,
+                    "start": TIMELINE_START + k * INTERVAL_SPACING,
+                    "final": TIMELINE_START + k * INTERVAL_SPACING + INTERVAL_LENGTH,
+                },
+            )
+    writer.flush()
+    n_daily_totals = rebuild_daily_totals()
+
+    return {
+        "users": n_users,
+        "goals": n_users * goals_per_user,
+        "intervals": n_users * intervals_per_user,
+        "daily_goal_totals": n_daily_totals,
+    }
+
+
+def fresh_user(user_id=1):
+    """
+    Returns:
+        (User): the user, loaded into an empty identity map (as every request does)
+    """
+    db.session.expunge_all()
+    return User.query.get(user_id)
+
+
+def time_it(fn, *args, repeat, setup=None):
+    """
+    Call `fn(*args)` `repeat` times - or, if `setup` is given, `fn(setup(), *args)`,
+    where only the call of `fn` is timed.
+
+    Returns:
+        (tuple): the median duration (in seconds), and the result of the last call
+    """
+    durations = []
+    for __ in range(repeat):
+        call_args = args if setup is None else (setup(),) + args
+        t0 = time.perf_counter()
+        result = fn(*call_args)
+        durations.append(time.perf_counter() - t0)
+    return statistics.median(durations), result
+
+
+def percentile(sorted_values, p):
+    # The nearest-rank method.
+    index = max(0, -(-len(sorted_values) * p // 100) - 1)
+    return sorted_values[int(index)]
@@ -0,0 +1,91 @@
+"""
+Show the query plans of the hot queries in `goal_tracker/api/goals.py` and
+`goal_tracker/api/intervals.py` - first without and then with the indexes,
+which are declared on the `goals` and `intervals` tables.
+
+Usage (from the root of the repository):
+    $ python -m benchmarks.explain_indexes
+"""
+from goal_tracker import create_app, db
+from goal_tracker.models import Goal, Interval
+
+from benchmarks import datasets
+
+
+USER_ID = 1
+GOAL_ID = 1
+
+
+def hot_queries():
+    """
+    Returns:
+        (list): pairs of the form (description, SQLAlchemy query)
+    """
+    owned_goal_ids = [g.id for g in Goal.query.filter_by(user_id=USER_ID)]
+    return [
+        ("get_goals", Goal.query.filter_by(user_id=USER_ID)),
+        (
+            "create_goal/edit_goal - duplicate description",
+            Goal.query.filter_by(user_id=USER_ID, description="Read a book"),
+        ),
+        (
+            "edit_goal/delete_goal/create_interval - goal ownership",
+            Goal.query.filter_by(user_id=USER_ID, id=GOAL_ID),
+        ),
+        (
+            "get_intervals - count",
+            Interval.query.filter(Interval.goal_id.in_(owned_goal_ids)),
+        ),
+        (
+            "get_intervals - page",
+            Interval.query.filter(Interval.goal_id.in_(owned_goal_ids))
+            .limit(10)
+            .offset(20),
+        ),
+        (
+            "delete_goal - cascade to intervals",
+            Interval.query.filter_by(goal_id=GOAL_ID),
+        ),
+    ]
+
+
+def explain(query):
+    statement = query.statement.compile(
+        db.engine, compile_kwargs={"literal_binds": True}
+    )
+    prefix = "EXPLAIN QUERY PLAN" if db.engine.name == "sqlite" else "EXPLAIN"
+    rows = db.session.execute(f"{prefix} {statement}").fetchall()
+    return [" | ".join(str(value) for value in row) for row in rows]
+
+
+def print_plans(title):
+    print(f"===== {title} =====")
+    for description, query in hot_queries():
+        print(f"--- {description}")
+        for line in explain(query):
+            print(f"    {line}")
+    print()
+
+
+def main():
+    app = create_app("testing")
+    with app.app_context():
+        datasets.populate(10, 20, 50)
+
+        indexes = list(Goal.__table__.indexes) + list(Interval.__table__.indexes)
+
+        for index in indexes:
+            index.drop(db.engine)
+        db.session.execute("ANALYZE")
+        print_plans("without indexes")
+
+        for index in indexes:
+            index.create(db.engine)
+        db.session.execute("ANALYZE")
+        print_plans("with indexes")
+
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -17,18 +17,115 @@ class Config(object):
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # The engine profile ("default", "mysql", "sqlite" or "auto"; see
+    # `goal_tracker.engines`), the size of the connection pool (plus how many
+    # connections may be opened in excess of it), how many seconds a connection
+    # may live (MySQL only) and how many seconds a request may wait for one.
+    DATABASE_ENGINE_PROFILE = os.environ.get("DATABASE_ENGINE_PROFILE", "default")
+    DATABASE_POOL_SIZE = int(os.environ.get("DATABASE_POOL_SIZE", 10))
+    DATABASE_MAX_OVERFLOW = int(os.environ.get("DATABASE_MAX_OVERFLOW", 20))
+    DATABASE_POOL_RECYCLE = int(os.environ.get("DATABASE_POOL_RECYCLE", 1800))
+    DATABASE_POOL_TIMEOUT = 10
+    # The (comma-separated) URLs of read replicas of the database, which serve
+    # the GET requests for goals and intervals. See `goal_tracker.replicas`.
+    DATABASE_REPLICA_URLS = [
+        url.strip()
+        for url in os.environ.get("DATABASE_REPLICA_URLS", "").split(",")
+        if url.strip()
+    ]
+    # The number of bytes of an SQLite database to memory-map, and for how many
+    # milliseconds to retry a statement, which finds the database locked.
+    SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get("SQLITE_BUSY_TIMEOUT", 5000))
+
+    # How many seconds access tokens and refresh tokens remain valid for.
+    ACCESS_TOKEN_EXPIRES_IN = int(os.environ.get("ACCESS_TOKEN_EXPIRES_IN", 3600))
+    REFRESH_TOKEN_EXPIRES_IN = int(
+        os.environ.get("REFRESH_TOKEN_EXPIRES_IN", 30 * 24 * 3600)
+    )
+
+    # How many authenticated users to cache, and for how many seconds.
+    AUTH_CACHE_MAXSIZE = int(os.environ.get("AUTH_CACHE_MAXSIZE", 1024))
+    AUTH_CACHE_TTL = int(os.environ.get("AUTH_CACHE_TTL", 60))
+
+    # How many responses to GET requests for goals and intervals to cache,
+    # for how many seconds, and how many bytes they may occupy in total.
+    # (Setting the maximum size to 0 disables the response cache.)
+    RESPONSE_CACHE_MAXSIZE = int(os.environ.get("RESPONSE_CACHE_MAXSIZE", 4096))
+    RESPONSE_CACHE_TTL = int(os.environ.get("RESPONSE_CACHE_TTL", 300))
+    RESPONSE_CACHE_MAX_BYTES = int(
+        os.environ.get("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+    )
+
+    # Whether to instrument requests and expose the metrics at `/metrics`.
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "false").lower() == "true"
+
+    # How many times a request may execute the same SQL statement (up to the values
+    # of its parameters), before a warning about a likely N+1 query pattern is
+    # logged. (0 disables the check.)
+    QUERY_REPEAT_WARNING_THRESHOLD = int(
+        os.environ.get("QUERY_REPEAT_WARNING_THRESHOLD", 0)
+    )
+
+    # How many seconds an SQL statement may take, before it's logged (along with the
+    # query plan, if it's a SELECT statement), and how many distinct statements to
+    # keep for `GET /admin/slow-queries`. (0 disables the slow-query log.)
+    SLOW_QUERY_THRESHOLD = float(os.environ.get("SLOW_QUERY_THRESHOLD", 0))
+    SLOW_QUERY_LOG_MAXSIZE = int(os.environ.get("SLOW_QUERY_LOG_MAXSIZE", 200))
+
+    # The (comma-separated) email addresses of the users, who may access `/admin/...`.
+    ADMIN_EMAILS = [
+        email.strip()
+        for email in os.environ.get("ADMIN_EMAILS", "").split(",")
+        if email.strip()
+    ]
+
+    # Whether to profile requests by means of cProfile: which fraction of the requests
+    # to profile at random, which header (carrying which secret value) requests
+    # a profile explicitly, and where to dump the profiles.
+    PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "false").lower() == "true"
+    PROFILING_SAMPLE_RATE = float(os.environ.get("PROFILING_SAMPLE_RATE", 0))
+    PROFILING_HEADER = "X-Profile"
+    PROFILING_SECRET = os.environ.get("PROFILING_SECRET")
+    PROFILING_DIR = os.environ.get("PROFILING_DIR", "profiles")
+
+    # The policy for hashing passwords.
+    # (Hashes created according to a different policy are upgraded upon login.)
+    PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "pbkdf2:sha256")
+    PASSWORD_HASH_ITERATIONS = int(os.environ.get("PASSWORD_HASH_ITERATIONS", 150000))
+    PASSWORD_HASH_SALT_LENGTH = 8
+    # The size of the worker pool that hashes and verifies passwords, the number of
+    # jobs that may wait for a worker, and how many seconds a caller waits for a job.
+    PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 4))
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get("PASSWORD_HASH_MAX_PENDING", 16))
+    PASSWORD_HASH_TIMEOUT = 5
+
+    # How many rows `GET /intervals/export` fetches (and emits) at a time.
+    EXPORT_CHUNK_SIZE = 1000
+
+    # The maximum number of intervals `POST /intervals/batch` accepts.
+    INTERVALS_BATCH_MAX_SIZE = 500
+
+    # Whether creating or editing an interval, which overlaps with another one of
+    # the same user's, is rejected (unless the request says otherwise by means of
+    # the `reject_overlaps` query parameter).
+    INTERVALS_REJECT_OVERLAPS = False
+
 
 class DevelopmentConfig(Config):
     DEBUG = True
+    QUERY_REPEAT_WARNING_THRESHOLD = 10
 
 
 class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = "sqlite://"
+    PASSWORD_HASH_ITERATIONS = 1000
+    QUERY_REPEAT_WARNING_THRESHOLD = 10
 
 
 class ProductionConfig(Config):
-    pass
+    DATABASE_ENGINE_PROFILE = os.environ.get("DATABASE_ENGINE_PROFILE", "auto")
 
 
 config = {
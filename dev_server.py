@@ -1,7 +1,12 @@
 import subprocess
 import sys
 
+import click
+
 from goal_tracker import create_app
+from goal_tracker.profiling import collapse_profiles, profile_paths
+from goal_tracker.rollups import rebuild_daily_totals
+from goal_tracker.seed import seed_database
 
 
 app = create_app()
@@ -19,5 +24,59 @@ def test():
     sys.exit(tests)
 
 
+@app.cli.command("rebuild-rollups")
+def rebuild_rollups():
+    """
+    Recompute the daily_goal_totals table from the intervals table
+    (goal by goal, each in a transaction of its own).
+    """
+    n_rows = rebuild_daily_totals()
+    print(f"wrote {n_rows} rows to the daily_goal_totals table")
+
+
+@app.cli.command()
+@click.option("--users", default=1000, show_default=True)
+@click.option("--max-goals", default=50, show_default=True, help="per user")
+@click.option("--days", default=365, show_default=True)
+@click.option("--seed", default=0, show_default=True)
+@click.option("--chunk-size", default=10000, show_default=True, help="rows per commit")
+@click.option("--password", default="123456", show_default=True)
+def seed(users, max_goals, days, seed, chunk_size, password):
+    """Fill an empty database with a large synthetic dataset."""
+    try:
+        counts = seed_database(
+            app.password_hasher.hash(password),
+            n_users=users,
+            max_goals=max_goals,
+            n_days=days,
+            seed=seed,
+            chunk_size=chunk_size,
+        )
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    for table_name, n_rows in counts.items():
+        print(f"wrote {n_rows} rows to the {table_name} table")
+
+
+@app.cli.command("collapse-profiles")
+@click.argument("endpoints", nargs=-1)
+@click.option(
+    "--output", type=click.File("w"), default="-", help="(default: standard output)"
+)
+def collapse_profiles_command(endpoints, output):
+    """
+    Aggregate the request profiles (of the given endpoints, or of all of them)
+    into collapsed stacks, which are the input of flamegraph.pl.
+    """
+    paths = profile_paths(app.config["PROFILING_DIR"], endpoints)
+    if not paths:
+        raise click.ClickException(
+            f"There are no profiles in {app.config['PROFILING_DIR']}."
+        )
+    for stack, microseconds in sorted(collapse_profiles(paths).items()):
+        output.write(f"{stack} {microseconds}\n")
+    click.echo(f"aggregated {len(paths)} profiles", err=True)
+
+
 if __name__ == "__main__":
     app.run(use_debugger=False, use_reloader=False, passthrough_errors=True)
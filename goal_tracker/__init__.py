@@ -1,11 +1,13 @@
 import os
 
 from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from itsdangerous import TimedJSONWebSignatureSerializer as Serializer
 
 from config import config
+from goal_tracker.cache import TTLCache
+from goal_tracker.engines import SQLAlchemy
+from goal_tracker.passwords import PasswordHasher
 
 
 # Create instances of necessary Flask extensions.
@@ -40,7 +42,40 @@ def create_app(config_name=None):
     will also have access to the TimedJSONWebSignatureSerializer instance.)
     '''
     # fmt: on
-    app.token_serializer = Serializer(app.config["SECRET_KEY"], expires_in=3600)
+    app.token_serializer = Serializer(
+        app.config["SECRET_KEY"], expires_in=app.config["ACCESS_TOKEN_EXPIRES_IN"]
+    )
+    # Refresh tokens are signed with a different salt,
+    # so that neither kind of token can be passed off as the other.
+    app.refresh_token_serializer = Serializer(
+        app.config["SECRET_KEY"],
+        expires_in=app.config["REFRESH_TOKEN_EXPIRES_IN"],
+        salt="refresh-token",
+    )
+
+    # Cache the outcome of successful token authentications,
+    # so that not every request has to look up its user in the database.
+    app.principal_cache = TTLCache(
+        maxsize=app.config["AUTH_CACHE_MAXSIZE"],
+        ttl=app.config["AUTH_CACHE_TTL"],
+    )
+
+    # Cache the responses to (idempotent) requests for goals and intervals.
+    app.response_cache = TTLCache(
+        maxsize=app.config["RESPONSE_CACHE_MAXSIZE"],
+        ttl=app.config["RESPONSE_CACHE_TTL"],
+        max_bytes=app.config["RESPONSE_CACHE_MAX_BYTES"],
+    )
+
+    app.password_hasher = PasswordHasher.from_config(app.config)
+
+    from goal_tracker import metrics, profiling, queries, replicas, slow_queries
+
+    replicas.init_app(app)
+    metrics.init_app(app)
+    queries.init_app(app)
+    slow_queries.init_app(app)
+    profiling.init_app(app)
 
     # Register `Blueprint`(s) with the application instance.
     # (By themselves, `Blueprint`s are "inactive".)
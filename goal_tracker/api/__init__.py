@@ -1,6 +1,15 @@
-from flask import Blueprint, jsonify
+import functools
+import hashlib
+
+from flask import Blueprint, current_app, g, jsonify, make_response, request
 from werkzeug.http import HTTP_STATUS_CODES
 
+from goal_tracker.auth import token_auth
+from goal_tracker.models import User
+from goal_tracker.passwords import PasswordHasherBusy
+from goal_tracker.replicas import choose_replica
+from goal_tracker.utils import parse_time
+
 
 api_bp = Blueprint("api_bp_name", __name__)
 
@@ -15,4 +24,161 @@ def error_response(status_code, message):
     return r
 
 
-from goal_tracker.api import users, tokens, goals, intervals
+def parse_time_arg(name):
+    """
+    Args:
+        name (str): the name of a query parameter
+
+    Returns:
+        (datetime.datetime or None): the timestamp, which the query parameter holds
+
+    Raises:
+        ValueError: if the query parameter doesn't match the format "YYYY-MM-DD HH:MM"
+    """
+    value = request.args.get(name)
+    if value is None:
+        return None
+    return parse_time(value)
+
+
+def conditional(view):
+    """
+    Make a GET handler for the logged-in user's goals or intervals answer
+    conditional requests, and cache its responses.
+
+    The ETag is derived from the user's `data_version` (and ID), and from the
+    requested URL (see `_response_cache_key`), so a matching `If-None-Match` header
+    is answered with "304 Not Modified" by means of a single small query - without
+    running the handler, i.e. without loading or serializing any goals or intervals.
+    (Since an ETag is only ever issued for a successful response, and it is only
+    valid for the URL, which it was issued for, a 304 never stands in for an error,
+    which the handler would have returned.)
+
+    Otherwise, the response is looked up in `current_app.response_cache`
+    (see `_response_cache_key`), and the handler only runs upon a miss. Because
+    the cache key includes the `data_version`, a cached response can never be
+    served after any process has recorded a change to the user's data
+    (see `record_data_change`).
+
+    NB! This decorator must be applied below `token_auth.login_required`.
+    """
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        user_id = token_auth.current_user().id
+        # The version is read before the handler runs. If a write slips in between,
+        # the response is tagged with an outdated version, which merely causes
+        # the client to re-fetch the (already up-to-date) representation later.
+        data_version = User.get_data_version(user_id)
+        cache_key = _response_cache_key(user_id, data_version)
+        etag = _etag(cache_key)
+
+        # (If-None-Match calls for the weak comparison, so that e.g. a proxy, which
+        # compressed the response and weakened the ETag to W/"...", still matches.)
+        if request.if_none_match.contains_weak(etag):
+            r = make_response("", 304)
+            r.set_etag(etag)
+            return r
+
+        cached = current_app.response_cache.get(cache_key)
+        if cached is not None:
+            body, mimetype = cached
+            r = current_app.response_class(body, mimetype=mimetype)
+            r.headers["X-Cache"] = "HIT"
+        else:
+            r = make_response(view(*args, **kwargs))
+            if r.status_code == 200:
+                body = r.get_data()
+                current_app.response_cache.set(
+                    cache_key, (body, r.mimetype), tags=(user_id,), size=len(body)
+                )
+            r.headers["X-Cache"] = "MISS"
+
+        if r.status_code == 200:
+            r.set_etag(etag)
+        return r
+
+    return wrapper
+
+
+def reads_from_replica(view):
+    """
+    Make a (read-only) GET handler for the logged-in user's data execute its
+    statements on a read replica, unless the replica hasn't caught up with the
+    user's latest write yet, i.e. its copy of the user's `data_version` differs
+    from the primary's (see `goal_tracker.replicas`).
+
+    NB! This decorator must be applied below `token_auth.login_required` (so that
+    authentication is done against the primary) and above `conditional` (so that
+    the `data_version`, which the ETag and the response cache rely on, is read
+    from the same database as the data).
+    """
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        bind_key = choose_replica()
+        if bind_key is None:
+            return view(*args, **kwargs)
+
+        user_id = token_auth.current_user().id
+        primary_version = User.get_data_version(user_id)
+        g.replica_bind_key = bind_key
+        try:
+            if User.get_data_version(user_id) != primary_version:
+                # The replica lags behind the user's latest write.
+                g.pop("replica_bind_key")
+            return view(*args, **kwargs)
+        finally:
+            g.pop("replica_bind_key", None)
+
+    return wrapper
+
+
+def _response_cache_key(user_id, data_version):
+    # Normalize the query string, so that e.g. "?page=2&per_page=5" and
+    # "?per_page=5&page=2" share a cache entry.
+    return (
+        user_id,
+        data_version,
+        request.endpoint,
+        tuple(sorted(request.view_args.items())),
+        tuple(sorted(request.args.items(multi=True))),
+    )
+
+
+def _etag(cache_key):
+    # The user's ID and data version, and a digest of the rest of the cache key
+    # (which identifies the requested URL).
+    user_id, data_version = cache_key[:2]
+    digest = hashlib.sha1(repr(cache_key[2:]).encode("utf-8")).hexdigest()[:16]
+    return f"{user_id}.{data_version}.{digest}"
+
+
+def record_data_change(user_id):
+    """
+    Record that some of the goals or intervals of a user have changed
+    (which invalidates both the ETags and the cached responses for them,
+    and routes the user's reads to the primary database until the change
+    has been replicated).
+
+    NB! The caller is responsible for committing the database session.
+
+    Args:
+        user_id (int): the ID of a user
+    """
+    User.bump_data_version(user_id)
+    # Entries for older versions would never be hit again anyway,
+    # but there is no point in keeping them around until they are evicted.
+    current_app.response_cache.invalidate(user_id)
+
+
+@api_bp.errorhandler(PasswordHasherBusy)
+def password_hasher_busy(e):
+    r = error_response(
+        503, "The server is handling too many logins; please try again later."
+    )
+    r.headers["Retry-After"] = "1"
+    return r
+
+
+from goal_tracker.api import users, tokens, goals, intervals, stats, admin
@@ -0,0 +1,52 @@
+from flask import current_app
+
+from goal_tracker.api import api_bp, error_response
+
+from goal_tracker.auth import token_auth
+
+
+def _admin_error():
+    """
+    Returns:
+        (flask.Response or None): an error response, unless the logged-in user's
+            email address is one of `ADMIN_EMAILS`
+    """
+    if token_auth.current_user().email not in current_app.config["ADMIN_EMAILS"]:
+        return error_response(403, "Only administrators may access this resource.")
+    return None
+
+
+@api_bp.route("/admin/slow-queries", methods=["GET"])
+@token_auth.login_required
+def get_slow_queries():
+    """
+    Return the slow SQL statements (grouped by fingerprint, the most expensive
+    in total first), along with the query plans of the SELECT statements.
+    """
+    error = _admin_error()
+    if error is not None:
+        return error
+
+    slow_query_log = getattr(current_app, "slow_query_log", None)
+    if slow_query_log is None:
+        return error_response(404, "The slow-query log is disabled.")
+
+    return {
+        "threshold_ms": current_app.config["SLOW_QUERY_THRESHOLD"] * 1000,
+        "slow_queries": slow_query_log.entries(),
+    }
+
+
+@api_bp.route("/admin/slow-queries", methods=["DELETE"])
+@token_auth.login_required
+def delete_slow_queries():
+    error = _admin_error()
+    if error is not None:
+        return error
+
+    slow_query_log = getattr(current_app, "slow_query_log", None)
+    if slow_query_log is None:
+        return error_response(404, "The slow-query log is disabled.")
+
+    slow_query_log.clear()
+    return "", 204
@@ -1,6 +1,12 @@
 from flask import jsonify, request, url_for
 
-from goal_tracker.api import api_bp, error_response
+from goal_tracker.api import (
+    api_bp,
+    conditional,
+    error_response,
+    reads_from_replica,
+    record_data_change,
+)
 
 from goal_tracker import db
 from goal_tracker.auth import token_auth
@@ -9,8 +15,15 @@ from goal_tracker.models import Goal
 
 @api_bp.route("/goals", methods=["GET"])
 @token_auth.login_required
+@reads_from_replica
+@conditional
 def get_goals():
-    curr_user_goals = token_auth.current_user().goals.all()
+    # Fetch just the needed columns (rather than `Goal` instances).
+    curr_user_goals = (
+        db.session.query(Goal.id, Goal.description)
+        .filter(Goal.user_id == token_auth.current_user().id)
+        .order_by(Goal.id)
+    )
     return {
         "goals": [{"id": g.id, "description": g.description} for g in curr_user_goals]
     }
@@ -18,6 +31,8 @@ def get_goals():
 
 @api_bp.route("/goals/<int:goal_id>", methods=["GET"])
 @token_auth.login_required
+@reads_from_replica
+@conditional
 def get_goal(goal_id):
     goal = Goal.query.get_or_404(goal_id)  # NB! Content-Type: text/html; charset=utf-8
 
@@ -56,6 +71,7 @@ def create_goal():
     # Create a new goal for the logged-in user.
     goal = Goal(description=description)
     token_auth.current_user().goals.append(goal)
+    record_data_change(token_auth.current_user().id)
     db.session.commit()
 
     r = jsonify({"id": goal.id, "description": goal.description})
@@ -108,6 +124,7 @@ def edit_goal(goal_id):
 
     # Update the goal.
     goal.description = description or goal.description
+    record_data_change(token_auth.current_user().id)
     db.session.commit()
 
     return {"id": goal.id, "description": goal.description}
@@ -124,5 +141,6 @@ def delete_goal(goal_id):
         )
 
     db.session.delete(goal)
+    record_data_change(token_auth.current_user().id)
     db.session.commit()
     return "", 204
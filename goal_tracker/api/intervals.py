@@ -1,25 +1,123 @@
-from flask import jsonify, request, url_for
+import csv
+import io
+import json
 
-from goal_tracker.api import api_bp, error_response
+from flask import Response, current_app, jsonify, request, stream_with_context, url_for
+from werkzeug.http import HTTP_STATUS_CODES
+
+from goal_tracker.api import (
+    api_bp,
+    conditional,
+    error_response,
+    parse_time_arg,
+    reads_from_replica,
+    record_data_change,
+)
 
 from goal_tracker import db
 from goal_tracker.auth import token_auth
-from goal_tracker.models import Interval
+from goal_tracker.models import Goal, Interval
+from goal_tracker.rollups import update_daily_totals
 from goal_tracker.utils import format_time, parse_time
 
 
 @api_bp.route("/intervals", methods=["GET"])
 @token_auth.login_required
+@reads_from_replica
+@conditional
 def get_intervals():
-    goal_ids = [g.id for g in token_auth.current_user().goals.all()]
-    intervals_query = Interval.query.filter(Interval.goal_id.in_(goal_ids))
+    intervals_query = Interval.query_owned_by(token_auth.current_user().id)
+
+    # Apply the optional filters.
+    # (Each one is a range or equality predicate,
+    # which can be served by the index on `intervals(goal_id, start)`.)
+    try:
+        from_ = parse_time_arg("from")
+        to = parse_time_arg("to")
+    except ValueError:
+        return error_response(
+            400,
+            'If provided, "from" and "to" must match the format "YYYY-MM-DD HH:MM".',
+        )
+    if from_ is not None:
+        intervals_query = intervals_query.filter(Interval.start >= from_)
+    if to is not None:
+        intervals_query = intervals_query.filter(Interval.start < to)
 
-    per_page = min(
-        100,
-        request.args.get("per_page", default=10, type=int),
+    # Restrict to the intervals overlapping a time window, or a point in time.
+    try:
+        overlaps = _parse_window_arg("overlaps")
+        at = parse_time_arg("at")
+    except ValueError:
+        return error_response(
+            400,
+            'If provided, "overlaps" must be of the form'
+            ' "YYYY-MM-DD HH:MM,YYYY-MM-DD HH:MM"'
+            ' and "at" must match the format "YYYY-MM-DD HH:MM".',
+        )
+    if overlaps is not None:
+        intervals_query = intervals_query.filter(Interval.overlaps(*overlaps))
+    if at is not None:
+        # (Bounding "start" from below, too, confines the scan of the index
+        # to the intervals, which may still be running at that point in time.)
+        intervals_query = intervals_query.filter(
+            Interval.start <= at,
+            Interval.start > at - Interval.MAX_DURATION,
+            Interval.final > at,
+        )
+
+    if "goal_id" in request.args:
+        goal_id = request.args.get("goal_id", type=int)
+        if goal_id is None:
+            return error_response(400, 'If provided, "goal_id" must be an integer.')
+        intervals_query = intervals_query.filter(Interval.goal_id == goal_id)
+
+    order = request.args.get("order", default="start")
+    if order not in ("start", "-start"):
+        return error_response(
+            400, 'If provided, "order" must be either "start" or "-start".'
+        )
+    descending = order == "-start"
+
+    # Make the links to other pages preserve the filters and the order.
+    filter_args = {
+        name: request.args[name]
+        for name in ("from", "to", "overlaps", "at", "goal_id", "order")
+        if name in request.args
+    }
+
+    per_page = max(
+        1,
+        min(100, request.args.get("per_page", default=10, type=int)),
     )
     page = request.args.get("page", default=1, type=int)
 
+    # If the client supplied a cursor, use keyset pagination (which is cheaper);
+    # otherwise, fall back to the page-number-based pagination.
+    after = request.args.get("after")
+    before = request.args.get("before")
+    if after is not None or before is not None:
+        try:
+            return Interval.to_keyset_collection_dict(
+                intervals_query,
+                per_page,
+                ".get_intervals",
+                after=after,
+                before=before,
+                descending=descending,
+                **filter_args,
+            )
+        except ValueError:
+            return error_response(400, "The provided cursor is invalid.")
+
+    # Order by a unique key, so that pages never overlap.
+    if descending:
+        intervals_query = intervals_query.order_by(
+            Interval.start.desc(), Interval.id.desc()
+        )
+    else:
+        intervals_query = intervals_query.order_by(Interval.start, Interval.id)
+
     # With regard to the `endpoint` parameter passed in to the next method call,
     # here is what the Flask documentation says:
     #   "In case blueprints are active
@@ -30,28 +128,182 @@ def get_intervals():
         per_page,
         page,
         ".get_intervals",
+        **filter_args,
     )
     return intervals_collection
 
 
-@api_bp.route("/intervals/<int:interval_id>", methods=["GET"])
+def _parse_window_arg(name):
+    """
+    Returns:
+        (tuple or None): the pair of timestamps, which the query parameter holds
+
+    Raises:
+        ValueError: if the query parameter isn't of the form
+            "YYYY-MM-DD HH:MM,YYYY-MM-DD HH:MM"
+    """
+    value = request.args.get(name)
+    if value is None:
+        return None
+    start_str, final_str = value.split(",")
+    return parse_time(start_str), parse_time(final_str)
+
+
+def _rejects_overlaps():
+    value = request.args.get("reject_overlaps")
+    if value is None:
+        return current_app.config["INTERVALS_REJECT_OVERLAPS"]
+    return value.lower() in ("1", "true", "yes")
+
+
+def _overlap_error(start, final, exclude_id=None):
+    """
+    Returns:
+        (flask.Response or None): a 409 error, if the time window overlaps with
+            any of the logged-in user's intervals (other than `exclude_id`)
+    """
+    query = Interval.query_owned_by(token_auth.current_user().id).filter(
+        Interval.overlaps(start, final)
+    )
+    if exclude_id is not None:
+        query = query.filter(Interval.id != exclude_id)
+    overlapping = query.with_entities(Interval.id).first()
+    if overlapping is None:
+        return None
+    return error_response(409, _overlap_message(overlapping.id))
+
+
+def _overlap_message(interval_id):
+    return (
+        f"The interval overlaps with another interval (id={interval_id})"
+        " of your user's."
+    )
+
+
+@api_bp.route("/intervals/export", methods=["GET"])
 @token_auth.login_required
-def get_interval(interval_id):
-    interval = Interval.query.get(interval_id)
+def export_intervals():
+    """
+    Stream all of the user's intervals (optionally restricted to those, which start
+    within [from, to) ) as newline-delimited JSON or as CSV.
 
-    message = None
-    if interval is None:
-        message = (
-            "Your user does not have a Goal resource"
-            ' that is associated with the provided "interval_id".'
+    The rows are fetched from a server-side cursor and emitted in chunks,
+    so the memory consumption doesn't depend on the number of intervals.
+    """
+    export_format = request.args.get("format", default="ndjson")
+    if export_format not in ("ndjson", "csv"):
+        return error_response(
+            400, 'If provided, "format" must be either "ndjson" or "csv".'
         )
-    elif interval.goal.user != token_auth.current_user():
-        message = (
-            "Your user does not have a Goal resource"
-            ' that is associated with the provided "interval_id".'
+
+    try:
+        from_ = parse_time_arg("from")
+        to = parse_time_arg("to")
+    except ValueError:
+        return error_response(
+            400,
+            'If provided, "from" and "to" must match the format "YYYY-MM-DD HH:MM".',
         )
-    if message is not None:
-        return error_response(400, message)
+
+    intervals_query = Interval.query_owned_by(token_auth.current_user().id)
+    if from_ is not None:
+        intervals_query = intervals_query.filter(Interval.start >= from_)
+    if to is not None:
+        intervals_query = intervals_query.filter(Interval.start < to)
+
+    chunk_size = current_app.config["EXPORT_CHUNK_SIZE"]
+    rows = (
+        intervals_query.with_entities(
+            Interval.id, Interval.goal_id, Interval.start, Interval.final
+        )
+        .order_by(Interval.start, Interval.id)
+        .execution_options(stream_results=True)
+        .yield_per(chunk_size)
+    )
+
+    if export_format == "ndjson":
+        generate_chunks = _generate_ndjson_chunks
+        mimetype = "application/x-ndjson"
+    else:
+        generate_chunks = _generate_csv_chunks
+        mimetype = "text/csv"
+
+    r = Response(
+        stream_with_context(generate_chunks(rows, chunk_size)), mimetype=mimetype
+    )
+    r.headers["Content-Disposition"] = f"attachment; filename=intervals.{export_format}"
+    return r
+
+
+def _generate_ndjson_chunks(rows, chunk_size):
+    lines = []
+    for id_, goal_id, start, final in rows:
+        lines.append(
+            json.dumps(
+                {
+                    "id": id_,
+                    "goal_id": goal_id,
+                    "start": format_time(start),
+                    "final": format_time(final),
+                }
+            )
+        )
+        if len(lines) == chunk_size:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def _generate_csv_chunks(rows, chunk_size):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["id", "goal_id", "start", "final"])
+    n_buffered = 0
+    for id_, goal_id, start, final in rows:
+        writer.writerow([id_, goal_id, format_time(start), format_time(final)])
+        n_buffered += 1
+        if n_buffered == chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            n_buffered = 0
+    yield buffer.getvalue()
+
+
+_NOT_OWNED_INTERVAL_MESSAGE = (
+    "Your user does not have a Goal resource"
+    ' that is associated with the provided "interval_id".'
+)
+
+_TOO_LONG_INTERVAL_MESSAGE = (
+    "An interval may last at most"
+    f" {Interval.MAX_DURATION.total_seconds() / 3600:g} hours."
+)
+
+
+def _get_owned_interval(interval_id):
+    """
+    Returns:
+        (Interval or None): the interval, if it exists and belongs to the logged-in
+            user (which is checked by the same query, rather than by lazily loading
+            `interval.goal.user`)
+    """
+    return (
+        Interval.query_owned_by(token_auth.current_user().id)
+        .filter(Interval.id == interval_id)
+        .first()
+    )
+
+
+@api_bp.route("/intervals/<int:interval_id>", methods=["GET"])
+@token_auth.login_required
+@reads_from_replica
+@conditional
+def get_interval(interval_id):
+    interval = _get_owned_interval(interval_id)
+    if interval is None:
+        return error_response(400, _NOT_OWNED_INTERVAL_MESSAGE)
 
     return {
         "id": interval.id,
@@ -74,91 +326,428 @@ def create_interval():
             ),
         )
 
-    goal_id = request.json.get("goal_id")
-    if goal_id is None or not isinstance(goal_id, int):
-        return error_response(
-            400, "The request body must include a goal_id, which must be an int."
-        )
-    if token_auth.current_user().goals.filter_by(id=goal_id).first() is None:
+    interval_fields, message = _validate_new_interval(request.json)
+    if message is not None:
+        return error_response(400, message)
+    if (
+        token_auth.current_user().goals.filter_by(id=interval_fields["goal_id"]).first()
+        is None
+    ):
         return error_response(
             400, 'Your user does not have a Goal resource with the provided "goal_id".'
         )
 
-    start_str = request.json.get("start")
-    if start_str is None:
-        return error_response(
-            400, 'The request body must include both a "start" timestamp.'
-        )
-    else:
-        try:
-            start = parse_time(start_str)
-        except ValueError:
-            return error_response(
-                400, '"start" must match the format "YYYY-MM-DD HH:MM".'
-            )
-
-    final_str = request.json.get("final")
-    if final_str is None:
-        return error_response(
-            400, 'The request body must include both a "final" timestamp.'
-        )
-    else:
-        try:
-            final = parse_time(final_str)
-        except ValueError:
-            return error_response(
-                400, '"final" must match the format "YYYY-MM-DD HH:MM".'
-            )
+    if _rejects_overlaps():
+        r = _overlap_error(interval_fields["start"], interval_fields["final"])
+        if r is not None:
+            return r
 
-    interval = Interval(start=start, final=final, goal_id=goal_id)
+    interval = Interval(**interval_fields)
     db.session.add(interval)
-    db.session.commit()
+    update_daily_totals(added=[(interval.goal_id, interval.start, interval.final)])
+    record_data_change(token_auth.current_user().id)
 
+    # (Serialize the interval, which has been flushed by now, before committing,
+    # since committing expires it and accessing it would reload it.)
     payload = {
         "id": interval.id,
         "start": format_time(interval.start),
         "final": format_time(interval.final),
         "goal_id": interval.goal_id,
     }
+    db.session.commit()
+
     r = jsonify(payload)
     r.status_code = 201
-    r.headers["Location"] = url_for("api_bp_name.get_interval", interval_id=interval.id)
+    r.headers["Location"] = url_for(
+        "api_bp_name.get_interval", interval_id=payload["id"]
+    )
     return r
 
 
-@api_bp.route("/intervals/<int:interval_id>", methods=["PUT"])
+@api_bp.route("/intervals/batch", methods=["POST"])
 @token_auth.login_required
-def edit_interval(interval_id):
+def create_intervals():
+    """
+    Create several intervals at once.
+
+    All goal IDs are validated by means of a single ownership query,
+    and all valid intervals are inserted in bulk and committed together.
+    The response contains one result per submitted interval (in the same order);
+    its status code is 201 if all intervals were created, 207 if only some were,
+    and otherwise the status of all results (if they share it) or 400.
+
+    The reject-overlaps policy applies to each interval, as it does to
+    `POST /intervals` (see `_reject_overlapping_items`).
+    """
     if not request.json:
         return error_response(
             400,
             'Your request did not include a "Content-Type: application/json" header.',
         )
 
-    # Check whether the client supplied a valid interval_id (as part of the URL).
-    interval = Interval.query.get(interval_id)
+    payloads = request.json.get("intervals")
+    if not isinstance(payloads, list) or len(payloads) == 0:
+        return error_response(
+            400, 'The request body must include "intervals", a non-empty list.'
+        )
+    max_size = current_app.config["INTERVALS_BATCH_MAX_SIZE"]
+    if len(payloads) > max_size:
+        return error_response(
+            400, f"At most {max_size} intervals may be created by a single request."
+        )
 
-    message = None
-    if interval is None:
-        message = (
-            "Your user does not have a Goal resource"
-            ' that is associated with the provided "interval_id".'
+    results = [None] * len(payloads)
+    valid_items = []  # pairs of the form (index, interval_fields)
+    for index, payload in enumerate(payloads):
+        interval_fields, message = _validate_new_interval(payload)
+        if message is not None:
+            results[index] = _batch_error(message)
+        else:
+            valid_items.append((index, interval_fields))
+
+    goal_ids = {interval_fields["goal_id"] for __, interval_fields in valid_items}
+    owned_goal_ids = {
+        goal_id
+        for (goal_id,) in db.session.query(Goal.id).filter(
+            Goal.user_id == token_auth.current_user().id, Goal.id.in_(goal_ids)
         )
-    elif interval.goal.user != token_auth.current_user():
-        message = (
-            "Your user does not have a Goal resource"
-            ' that is associated with the provided "interval_id".'
+    }
+
+    mappings = []
+    for index, interval_fields in valid_items:
+        if interval_fields["goal_id"] not in owned_goal_ids:
+            results[index] = _batch_error(
+                'Your user does not have a Goal resource with the provided "goal_id".'
+            )
+        else:
+            mappings.append((index, interval_fields))
+
+    if mappings and _rejects_overlaps():
+        mappings = _reject_overlapping_items(mappings, results)
+
+    if mappings:
+        _insert_intervals([interval_fields for __, interval_fields in mappings])
+        update_daily_totals(
+            added=[(f["goal_id"], f["start"], f["final"]) for __, f in mappings]
+        )
+        record_data_change(token_auth.current_user().id)
+        db.session.commit()
+
+    for index, interval_fields in mappings:
+        results[index] = {
+            "status": 201,
+            "interval": {
+                "id": interval_fields["id"],
+                "start": format_time(interval_fields["start"]),
+                "final": format_time(interval_fields["final"]),
+                "goal_id": interval_fields["goal_id"],
+            },
+        }
+
+    if len(mappings) == len(payloads):
+        status_code = 201
+    elif len(mappings) == 0:
+        statuses = {result["status"] for result in results}
+        status_code = statuses.pop() if len(statuses) == 1 else 400
+    else:
+        status_code = 207  # Multi-Status
+    r = jsonify({"results": results})
+    r.status_code = status_code
+    return r
+
+
+def _insert_intervals(rows):
+    """
+    Insert intervals by means of a single (executemany) INSERT statement, and then
+    read back their IDs by means of a single SELECT statement, which scans only the
+    range of the primary key past the highest ID preceding the insert.
+
+    (Asking for the primary keys of the inserted rows, as `bulk_insert_mappings`
+    does with `return_defaults=True`, would take one INSERT statement per row.)
+
+    Args:
+        rows (list): dicts with the keys "goal_id", "start" and "final",
+            which get updated in place with the key "id"
+    """
+    max_id_before = db.session.query(db.func.max(Interval.id)).scalar() or 0
+    db.session.execute(Interval.__table__.insert(), rows)
+
+    rows_by_key = {}  # (goal_id, start, final) -> list of rows, in the given order
+    for row in rows:
+        key = (row["goal_id"], row["start"], row["final"])
+        rows_by_key.setdefault(key, []).append(row)
+
+    # The new rows get ascending IDs in the given order. (Concurrent inserts by
+    # other transactions aren't visible here: MySQL's REPEATABLE READ snapshot
+    # predates them, and SQLite admits a single writer at a time.)
+    for id_, goal_id, start, final in (
+        db.session.query(Interval.id, Interval.goal_id, Interval.start, Interval.final)
+        .filter(Interval.id > max_id_before)
+        .order_by(Interval.id)
+    ):
+        key_rows = rows_by_key.get((goal_id, start, final))
+        if key_rows:
+            key_rows.pop(0)["id"] = id_
+
+
+def _reject_overlapping_items(items, results):
+    """
+    Reject (with a 409 error) each item of a batch, which overlaps with an existing
+    interval of the logged-in user's, or with an earlier accepted item of the batch.
+
+    The existing intervals are checked by means of a single query.
+
+    Args:
+        items (list): pairs of the form (index, interval_fields)
+        results (list): the results of the batch, which get updated in place
+
+    Returns:
+        (list): the items, which have been accepted
+    """
+    existing = (
+        Interval.query_owned_by(token_auth.current_user().id)
+        .filter(db.or_(*(Interval.overlaps(f["start"], f["final"]) for __, f in items)))
+        .with_entities(Interval.id, Interval.start, Interval.final)
+        .all()
+    )
+
+    accepted = []
+    for index, interval_fields in items:
+        start, final = interval_fields["start"], interval_fields["final"]
+        overlapping_id = next(
+            (row.id for row in existing if row.start < final and row.final > start),
+            None,
+        )
+        overlapping_index = next(
+            (j for j, f in accepted if f["start"] < final and f["final"] > start),
+            None,
+        )
+        if overlapping_id is not None:
+            results[index] = _batch_error(_overlap_message(overlapping_id), 409)
+        elif overlapping_index is not None:
+            results[index] = _batch_error(
+                "The interval overlaps with another interval"
+                f" (index={overlapping_index}) of the batch.",
+                409,
+            )
+        else:
+            accepted.append((index, interval_fields))
+    return accepted
+
+
+def _batch_error(message, status_code=400):
+    return {
+        "status": status_code,
+        "error": HTTP_STATUS_CODES.get(status_code),
+        "message": message,
+    }
+
+
+def _validate_new_interval(payload):
+    """
+    Args:
+        payload (dict): the representation of an interval, which is to be created
+
+    Returns:
+        (tuple): a pair of the form (interval_fields, message) - exactly one of its
+            elements is `None`, depending on whether the payload is valid
+    """
+    if not isinstance(payload, dict):
+        return None, "Each interval must be represented by a JSON object."
+
+    goal_id = payload.get("goal_id")
+    if goal_id is None or not isinstance(goal_id, int):
+        return None, "The request body must include a goal_id, which must be an int."
+
+    start_str = payload.get("start")
+    if start_str is None:
+        return None, 'The request body must include both a "start" timestamp.'
+    try:
+        start = parse_time(start_str)
+    except (TypeError, ValueError):
+        return None, '"start" must match the format "YYYY-MM-DD HH:MM".'
+
+    final_str = payload.get("final")
+    if final_str is None:
+        return None, 'The request body must include both a "final" timestamp.'
+    try:
+        final = parse_time(final_str)
+    except (TypeError, ValueError):
+        return None, '"final" must match the format "YYYY-MM-DD HH:MM".'
+
+    if final - start > Interval.MAX_DURATION:
+        return None, _TOO_LONG_INTERVAL_MESSAGE
+
+    return {"goal_id": goal_id, "start": start, "final": final}, None
+
+
+@api_bp.route("/intervals/batch", methods=["PUT"])
+@token_auth.login_required
+def edit_intervals():
+    """
+    Reassign several intervals to another goal by means of a single UPDATE statement.
+
+    The intervals are selected either by `"ids"` or by `"filter"`
+    (see `_bulk_selection`), and the request body must also include
+    `"set": {"goal_id": <int>}`.
+    """
+    if not request.json:
+        return error_response(
+            400,
+            'Your request did not include a "Content-Type: application/json" header.',
         )
+
+    criteria, message = _bulk_selection(request.json)
     if message is not None:
         return error_response(400, message)
 
+    new_values = request.json.get("set")
+    if not isinstance(new_values, dict) or set(new_values) != {"goal_id"}:
+        return error_response(
+            400,
+            'The request body must include "set", which must be {"goal_id": <int>}.',
+        )
+    goal_id = new_values["goal_id"]
+    if not isinstance(goal_id, int):
+        return error_response(400, '"goal_id" must be an integer.')
+    if token_auth.current_user().goals.filter_by(id=goal_id).first() is None:
+        return error_response(
+            400, 'Your user does not have a Goal resource with the provided "goal_id".'
+        )
+
+    affected_rows = _lock_affected_rows(criteria)
+    update_daily_totals(
+        added=[(goal_id, start, final) for __, start, final in affected_rows],
+        removed=affected_rows,
+    )
+    affected = Interval.query.filter(*criteria).update(
+        {Interval.goal_id: goal_id}, synchronize_session=False
+    )
+    record_data_change(token_auth.current_user().id)
+    db.session.commit()
+
+    return {"affected": affected}
+
+
+@api_bp.route("/intervals/batch", methods=["DELETE"])
+@token_auth.login_required
+def delete_intervals():
+    """
+    Delete several intervals by means of a single DELETE statement.
+
+    The intervals are selected either by `"ids"` or by `"filter"`
+    (see `_bulk_selection`).
+    """
+    if not request.json:
+        return error_response(
+            400,
+            'Your request did not include a "Content-Type: application/json" header.',
+        )
+
+    criteria, message = _bulk_selection(request.json)
+    if message is not None:
+        return error_response(400, message)
+
+    update_daily_totals(removed=_lock_affected_rows(criteria))
+    affected = Interval.query.filter(*criteria).delete(synchronize_session=False)
+    record_data_change(token_auth.current_user().id)
+    db.session.commit()
+
+    return {"affected": affected}
+
+
+def _lock_affected_rows(criteria):
+    """
+    Fetch (and lock, where the database supports it) the columns, which the rollup
+    of the intervals matching a bulk request depends on.
+
+    Returns:
+        (list): triples of the form (goal_id, start, final)
+    """
+    return (
+        db.session.query(Interval.goal_id, Interval.start, Interval.final)
+        .filter(*criteria)
+        .with_for_update()
+        .all()
+    )
+
+
+def _bulk_selection(payload):
+    """
+    Translate the selection part of a bulk request's body into SQL conditions,
+    which are always scoped to the intervals of the logged-in user.
+
+    The body must include exactly one of:
+    - `"ids": [<int>, ...]`;
+    - `"filter": {"goal_id": <int>, "from": <timestamp>, "to": <timestamp>}`,
+      where "from" and "to" are optional and bound the intervals' "start".
+
+    Returns:
+        (tuple): a pair of the form (criteria, message) - exactly one of its
+            elements is `None`, depending on whether the payload is valid
+    """
+    criteria = [Interval.is_owned_by(token_auth.current_user().id)]
+
+    ids = payload.get("ids")
+    filter_ = payload.get("filter")
+    if (ids is None) == (filter_ is None):
+        return None, 'The request body must include either "ids" or "filter".'
+
+    if ids is not None:
+        max_size = current_app.config["INTERVALS_BATCH_MAX_SIZE"]
+        if (
+            not isinstance(ids, list)
+            or len(ids) == 0
+            or not all(isinstance(id_, int) for id_ in ids)
+        ):
+            return None, '"ids" must be a non-empty list of integers.'
+        if len(ids) > max_size:
+            return None, f'"ids" may contain at most {max_size} elements.'
+        criteria.append(Interval.id.in_(ids))
+        return criteria, None
+
+    if not isinstance(filter_, dict) or not isinstance(filter_.get("goal_id"), int):
+        return None, '"filter" must include a "goal_id", which must be an integer.'
+    criteria.append(Interval.goal_id == filter_["goal_id"])
+    try:
+        if filter_.get("from") is not None:
+            criteria.append(Interval.start >= parse_time(filter_["from"]))
+        if filter_.get("to") is not None:
+            criteria.append(Interval.start < parse_time(filter_["to"]))
+    except (TypeError, ValueError):
+        return (
+            None,
+            'If provided, "from" and "to" must match the format "YYYY-MM-DD HH:MM".',
+        )
+    return criteria, None
+
+
+@api_bp.route("/intervals/<int:interval_id>", methods=["PUT"])
+@token_auth.login_required
+def edit_interval(interval_id):
+    if not request.json:
+        return error_response(
+            400,
+            'Your request did not include a "Content-Type: application/json" header.',
+        )
+
+    # Check whether the client supplied a valid interval_id (as part of the URL).
+    interval = _get_owned_interval(interval_id)
+    if interval is None:
+        return error_response(400, _NOT_OWNED_INTERVAL_MESSAGE)
+
     # Check whether the client supplied all required arguments in the request body.
     goal_id = request.json.get("goal_id") or interval.goal_id
     if not isinstance(goal_id, int):
         return error_response(
             400, 'If the request body includes "goal_id", it must be an integer.'
         )
-    if token_auth.current_user().goals.filter_by(id=goal_id).first() is None:
+    # (The interval's current goal is known to belong to the user.)
+    if (
+        goal_id != interval.goal_id
+        and token_auth.current_user().goals.filter_by(id=goal_id).first() is None
+    ):
         return error_response(
             400, 'Your user does not have a Goal resource with the provided "goal_id".'
         )
@@ -185,39 +774,47 @@ def edit_interval(interval_id):
                 400, 'If provided, "final" must match the format "YYYY-MM-DD HH:MM".'
             )
 
+    if (final or interval.final) - (start or interval.start) > Interval.MAX_DURATION:
+        return error_response(400, _TOO_LONG_INTERVAL_MESSAGE)
+
+    if _rejects_overlaps():
+        r = _overlap_error(
+            start or interval.start, final or interval.final, exclude_id=interval.id
+        )
+        if r is not None:
+            return r
+
     # Update the interval.
+    old_values = (interval.goal_id, interval.start, interval.final)
     interval.start = start or interval.start
     interval.final = final or interval.final
     interval.goal_id = goal_id or interval.goal_id
-    db.session.commit()
+    update_daily_totals(
+        added=[(interval.goal_id, interval.start, interval.final)],
+        removed=[old_values],
+    )
+    record_data_change(token_auth.current_user().id)
 
-    return {
+    payload = {
         "id": interval.id,
         "start": format_time(interval.start),
         "final": format_time(interval.final),
         "goal_id": interval.goal_id,
     }
+    db.session.commit()
+
+    return payload
 
 
 @api_bp.route("/intervals/<int:interval_id>", methods=["DELETE"])
 @token_auth.login_required
 def delete_interval(interval_id):
-    interval = Interval.query.get(interval_id)
-
-    message = None
+    interval = _get_owned_interval(interval_id)
     if interval is None:
-        message = (
-            "Your user does not have a Goal resource"
-            ' that is associated with the provided "interval_id".'
-        )
-    elif interval.goal.user != token_auth.current_user():
-        message = (
-            "Your user does not have a Goal resource"
-            ' that is associated with the provided "interval_id".'
-        )
-    if message is not None:
-        return error_response(400, message)
+        return error_response(400, _NOT_OWNED_INTERVAL_MESSAGE)
 
     db.session.delete(interval)
+    update_daily_totals(removed=[(interval.goal_id, interval.start, interval.final)])
+    record_data_change(token_auth.current_user().id)
     db.session.commit()
     return "", 204
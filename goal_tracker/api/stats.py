@@ -0,0 +1,56 @@
+from flask import request
+
+from goal_tracker.api import api_bp, error_response, parse_time_arg, reads_from_replica
+
+from goal_tracker.auth import token_auth
+from goal_tracker.stats import BUCKETS, interval_totals
+
+
+@api_bp.route("/stats", methods=["GET"])
+@token_auth.login_required
+@reads_from_replica
+def get_stats():
+    """
+    Return how much time the user has spent on each of their goals,
+    bucketed by day, week or month.
+    """
+    return _stats_response()
+
+
+@api_bp.route("/goals/<int:goal_id>/stats", methods=["GET"])
+@token_auth.login_required
+@reads_from_replica
+def get_goal_stats(goal_id):
+    if token_auth.current_user().goals.filter_by(id=goal_id).first() is None:
+        return error_response(
+            400, "You may only access goals that both exist and belong to you."
+        )
+
+    return _stats_response(goal_id=goal_id)
+
+
+def _stats_response(goal_id=None):
+    bucket = request.args.get("bucket", default="day")
+    if bucket not in BUCKETS:
+        return error_response(
+            400, 'If provided, "bucket" must be one of "day", "week", "month".'
+        )
+
+    try:
+        from_ = parse_time_arg("from")
+        to = parse_time_arg("to")
+    except ValueError:
+        return error_response(
+            400,
+            'If provided, "from" and "to" must match the format "YYYY-MM-DD HH:MM".',
+        )
+
+    items = interval_totals(
+        token_auth.current_user().id, bucket, goal_id=goal_id, from_=from_, to=to
+    )
+    return {
+        "bucket": bucket,
+        "from": request.args.get("from"),
+        "to": request.args.get("to"),
+        "items": items,
+    }
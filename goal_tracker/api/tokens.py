@@ -1,6 +1,7 @@
 from goal_tracker.api import api_bp
 
-from goal_tracker.auth import basic_auth
+from goal_tracker import db
+from goal_tracker.auth import basic_auth, refresh_token_auth
 
 
 @api_bp.route("/tokens", methods=["POST"])
@@ -8,7 +9,30 @@ from goal_tracker.auth import basic_auth
 def create_token():
     """
     Issue an access JSON Web Signature token
-    for a user (who has authenticated herself successfully).
+    for a user (who has authenticated herself successfully),
+    as well as a refresh token that can be exchanged for new access tokens.
     """
-    token = basic_auth.current_user().generate_token()
+    user = basic_auth.current_user()
+    token = user.generate_token()
+    refresh_token = user.generate_refresh_token()
+    db.session.commit()
+    return {"token": token, "refresh_token": refresh_token.to_token()}
+
+
+@api_bp.route("/tokens/refresh", methods=["POST"])
+@refresh_token_auth.login_required
+def refresh_access_token():
+    """
+    Issue a new access JSON Web Signature token
+    in exchange for a (valid and non-revoked) refresh token.
+    """
+    token = refresh_token_auth.current_user().generate_access_token()
     return {"token": token}
+
+
+@api_bp.route("/tokens/refresh", methods=["DELETE"])
+@refresh_token_auth.login_required
+def revoke_refresh_token():
+    db.session.delete(refresh_token_auth.current_user())
+    db.session.commit()
+    return "", 204
@@ -3,7 +3,7 @@ from flask import jsonify, request, url_for
 from goal_tracker.api import api_bp, error_response
 
 from goal_tracker import db
-from goal_tracker.auth import basic_auth, token_auth
+from goal_tracker.auth import basic_auth, invalidate_cached_principals, token_auth
 from goal_tracker.models import User
 
 
@@ -95,6 +95,7 @@ def edit_user(user_id):
     # Update the user.
     user.email = email or user.email
     db.session.commit()
+    invalidate_cached_principals(user_id)
 
     return {"id": user.id, "email": user.email}
 
@@ -110,4 +111,5 @@ def delete_user(user_id):
 
     db.session.delete(user)
     db.session.commit()
+    invalidate_cached_principals(user_id)
     return "", 204
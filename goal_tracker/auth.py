@@ -1,8 +1,10 @@
 from flask import jsonify, current_app
 from flask_httpauth import HTTPBasicAuth, HTTPTokenAuth
 from itsdangerous import BadSignature, SignatureExpired
+from sqlalchemy.orm import make_transient_to_detached
 
-from goal_tracker.models import User
+from goal_tracker import db
+from goal_tracker.models import RefreshToken, User
 
 
 basic_auth = HTTPBasicAuth()
@@ -13,6 +15,13 @@ def verify_password(email, password):
     user = User.query.filter_by(email=email).first()
     if user is None or not user.check_password(password):
         return False
+
+    # Transparently upgrade hashes, which were created according to an outdated
+    # policy (while the plaintext password is at hand).
+    if user.needs_password_rehash():
+        user.set_password_hash(password)
+        db.session.commit()
+
     return user
 
 
@@ -38,8 +47,19 @@ def verify_token(token):
     except BadSignature:
         return None  # invalid token
 
-    user = User.query.get_or_404(token_payload["user_id"])
+    # Tokens are signed, so the pair (user ID, signature) uniquely identifies
+    # a successful authentication; re-use its outcome until the entry expires.
+    user_id = token_payload["user_id"]
+    cache_key = (user_id, token.rsplit(".", 1)[-1])
+    user_columns = current_app.principal_cache.get(cache_key)
+    if user_columns is not None:
+        return _user_from_columns(user_columns)
+
+    user = User.query.get_or_404(user_id)
     if user is not None:
+        current_app.principal_cache.set(
+            cache_key, _user_to_columns(user), tags=(user_id,)
+        )
         return user
     return None
 
@@ -51,3 +71,59 @@ def token_auth_error():
     r.status_code = 401
     r.headers["WWW-Authenticate"] = 'Bearer realm="Authentication Required"'
     return r
+
+
+refresh_token_auth = HTTPTokenAuth(scheme="Bearer")
+
+
+@refresh_token_auth.verify_token
+def verify_refresh_token(token):
+    """
+    Return the (non-revoked) record, which corresponds to the refresh token.
+
+    Apart from checking the token's signature,
+    this costs a single lookup by primary key.
+    """
+    try:
+        token_payload = current_app.refresh_token_serializer.loads(token)
+    except SignatureExpired:
+        return None  # valid token, but expired
+    except BadSignature:
+        return None  # invalid token
+
+    return RefreshToken.query.get(token_payload["refresh_token_id"])
+
+
+@refresh_token_auth.error_handler
+def refresh_token_auth_error():
+    """Return a 401 error to the client."""
+    return token_auth_error()
+
+
+def invalidate_cached_principals(user_id):
+    """
+    Discard all cached authentications of the user with the given ID.
+
+    This must be called whenever a change to the user's record is committed.
+    """
+    current_app.principal_cache.invalidate(user_id)
+
+
+def _user_to_columns(user):
+    # Cache plain column values rather than the ORM instance itself,
+    # because the latter is bound to the session of the request that loaded it.
+    # (`data_version` changes far more often than the principal does, so it is
+    # left out and always read from the database - see `User.get_data_version`.)
+    return {
+        c.key: getattr(user, c.key)
+        for c in User.__table__.columns
+        if c.key != "data_version"
+    }
+
+
+def _user_from_columns(user_columns):
+    # Attach a copy of the cached user to the current session
+    # without emitting a SELECT statement.
+    user = User(**user_columns)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache(object):
+    """
+    A bounded, thread-safe mapping, whose entries expire `ttl` seconds after
+    they were stored.
+
+    When the cache is full, storing a new entry evicts the least recently used
+    one. Each entry may be stored together with a set of "tags", which makes it
+    possible to invalidate all entries sharing a tag (e.g. a user ID) at once.
+
+    If `max_bytes` is given, the cache is also full once the sizes of its entries
+    (as reported by the callers of `set`) add up to more than `max_bytes`.
+    """
+
+    def __init__(self, maxsize, ttl, max_bytes=None, timer=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._timer = timer
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, value, tags, size)
+        self._keys_by_tag = {}  # tag -> set of keys
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            expires_at, value, __, __ = entry
+            if expires_at <= self._timer():
+                self._remove(key)
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, tags=(), size=0):
+        if self.maxsize <= 0:
+            return
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (self._timer() + self.ttl, value, tuple(tags), size)
+            for tag in tags:
+                self._keys_by_tag.setdefault(tag, set()).add(key)
+            self._bytes += size
+
+            while len(self._entries) > self.maxsize or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def invalidate(self, tag):
+        """Remove every entry that was stored with the given tag."""
+        with self._lock:
+            for key in list(self._keys_by_tag.get(tag, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_tag.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def _remove(self, key):
+        # NB! The caller must be holding `self._lock`.
+        __, __, tags, size = self._entries.pop(key)
+        self._bytes -= size
+        for tag in tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
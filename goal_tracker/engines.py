@@ -0,0 +1,138 @@
+"""
+Engine profiles, i.e. `create_engine` options (and per-connection setup),
+which are tuned for a particular database backend.
+
+`DATABASE_ENGINE_PROFILE` selects one of
+- "default": Flask-SQLAlchemy's own defaults (a NullPool for file-based SQLite,
+  which opens a new connection for every session),
+- "mysql": a QueuePool of `DATABASE_POOL_SIZE` connections (plus up to
+  `DATABASE_MAX_OVERFLOW` temporary ones), which are recycled after
+  `DATABASE_POOL_RECYCLE` seconds (i.e. well before MySQL's `wait_timeout` or
+  a proxy would drop them) and checked ("pre-pinged") upon every checkout,
+- "sqlite": a QueuePool, too, and connections in WAL mode (so that readers don't
+  block the writer, and vice versa) with `synchronous=NORMAL` (which is durable
+  enough in WAL mode), a memory-mapped file of `SQLITE_MMAP_SIZE` bytes, and
+  a `busy_timeout` of `SQLITE_BUSY_TIMEOUT` milliseconds,
+- "auto": "mysql" or "sqlite", depending on the database URL.
+
+Any options in `SQLALCHEMY_ENGINE_OPTIONS` still take precedence.
+"""
+import flask_sqlalchemy
+from sqlalchemy import event, orm
+from sqlalchemy.pool import QueuePool
+
+from goal_tracker.replicas import RoutingSession
+
+
+# The key of the (internal) engine option, which carries the PRAGMAs
+# from `apply_driver_hacks` to `create_engine`.
+_SQLITE_PRAGMAS_OPTION = "_sqlite_pragmas"
+
+
+class SQLAlchemy(flask_sqlalchemy.SQLAlchemy):
+    """
+    Flask-SQLAlchemy, which applies the app's `DATABASE_ENGINE_PROFILE`
+    (and whose sessions may route reads to replicas; see `goal_tracker.replicas`).
+    """
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+    def apply_driver_hacks(self, app, sa_url, options):
+        super().apply_driver_hacks(app, sa_url, options)
+
+        profile = resolve_profile(app.config["DATABASE_ENGINE_PROFILE"], sa_url)
+        if profile == "mysql":
+            _apply_mysql_profile(app.config, sa_url, options)
+        elif profile == "sqlite":
+            _apply_sqlite_profile(app.config, sa_url, options)
+
+    def create_engine(self, sa_url, engine_opts):
+        pragmas = engine_opts.pop(_SQLITE_PRAGMAS_OPTION, None)
+        engine = super().create_engine(sa_url, engine_opts)
+        if pragmas:
+
+            @event.listens_for(engine, "connect")
+            def set_pragmas(dbapi_connection, connection_record):
+                cursor = dbapi_connection.cursor()
+                try:
+                    for name, value in pragmas:
+                        cursor.execute(f"PRAGMA {name}={value}")
+                finally:
+                    cursor.close()
+
+        return engine
+
+
+def resolve_profile(profile, sa_url):
+    """
+    Args:
+        profile (str): the value of `DATABASE_ENGINE_PROFILE`
+        sa_url (sqlalchemy.engine.url.URL): the database URL
+
+    Returns:
+        (str): "default", "mysql" or "sqlite"
+
+    Raises:
+        ValueError: if the profile is unknown, or meant for another backend
+    """
+    backend = sa_url.get_backend_name()
+    if profile == "auto":
+        return backend if backend in ("mysql", "sqlite") else "default"
+    if profile not in ("default", "mysql", "sqlite"):
+        raise ValueError(f'Unknown database engine profile: "{profile}".')
+    if profile != "default" and profile != backend:
+        raise ValueError(
+            f'The "{profile}" engine profile cannot be used with a {backend} database.'
+        )
+    return profile
+
+
+def _apply_mysql_profile(config, sa_url, options):
+    options.update(
+        pool_size=config["DATABASE_POOL_SIZE"],
+        max_overflow=config["DATABASE_MAX_OVERFLOW"],
+        pool_recycle=config["DATABASE_POOL_RECYCLE"],
+        pool_timeout=config["DATABASE_POOL_TIMEOUT"],
+        pool_pre_ping=True,
+    )
+
+
+def _apply_sqlite_profile(config, sa_url, options):
+    pragmas = [
+        ("synchronous", "NORMAL"),
+        ("mmap_size", config["SQLITE_MMAP_SIZE"]),
+        ("busy_timeout", config["SQLITE_BUSY_TIMEOUT"]),
+    ]
+    if sa_url.database not in (None, "", ":memory:"):
+        # (An in-memory database keeps Flask-SQLAlchemy's StaticPool,
+        # and its journal can't be written ahead to a file anyway.)
+        pragmas.insert(0, ("journal_mode", "WAL"))
+        options.update(
+            poolclass=QueuePool,
+            pool_size=config["DATABASE_POOL_SIZE"],
+            max_overflow=config["DATABASE_MAX_OVERFLOW"],
+            pool_timeout=config["DATABASE_POOL_TIMEOUT"],
+        )
+        # The pool hands connections to different threads (one at a time).
+        options.setdefault("connect_args", {})["check_same_thread"] = False
+    options[_SQLITE_PRAGMAS_OPTION] = pragmas
+
+
+def pool_stats(engine):
+    """
+    Returns:
+        (dict): the class of the engine's connection pool and, for a QueuePool,
+            its size, and the number of connections, which are checked in (idle),
+            checked out (in use), and in excess of the size ("overflow")
+    """
+    pool = engine.pool
+    stats = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(0, pool.overflow()),
+        )
+    return stats
@@ -0,0 +1,274 @@
+"""
+Request instrumentation, exposed at `/metrics` in the Prometheus text format.
+
+`init_app` installs the request hooks and the SQLAlchemy engine listeners only
+if `METRICS_ENABLED` is set, so an app without metrics pays nothing for them.
+"""
+import threading
+import time
+
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from goal_tracker import db
+from goal_tracker.engines import pool_stats
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram(object):
+    """A cumulative histogram, as defined by Prometheus (not thread-safe)."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last one is "+Inf".
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        for i, upper_bound in enumerate(self.buckets):
+            if value <= upper_bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name, labels):
+        cumulative = 0
+        for upper_bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            yield f"{name}_bucket", {**labels, "le": str(upper_bound)}, cumulative
+        yield f"{name}_sum", labels, self.sum
+        yield f"{name}_count", labels, self.count
+
+
+class Metrics(object):
+    """The metrics of one application (and worker process)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.requests = {}  # (endpoint, method, status) -> count
+        self.latencies = {}  # endpoint -> Histogram
+        self.query_counts = {}  # endpoint -> Histogram
+        self.query_durations = {}  # endpoint -> Histogram
+
+    def request_started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def observe_request(
+        self, endpoint, method, status, duration, n_queries, query_duration
+    ):
+        with self._lock:
+            key = (endpoint, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            for histograms, buckets, value in (
+                (self.latencies, LATENCY_BUCKETS, duration),
+                (self.query_counts, QUERY_COUNT_BUCKETS, n_queries),
+                (self.query_durations, LATENCY_BUCKETS, query_duration),
+            ):
+                if endpoint not in histograms:
+                    histograms[endpoint] = Histogram(buckets)
+                histograms[endpoint].observe(value)
+
+    def render(self, caches=(), pool=None):
+        """
+        Args:
+            caches: pairs of the form (name, TTLCache)
+            pool (dict): the statistics of the database connection pool
+                (see `goal_tracker.engines.pool_stats`)
+
+        Returns:
+            (str): the metrics in the Prometheus text exposition format
+        """
+        lines = []
+
+        def family(name, metric_type, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for sample_name, labels, value in samples:
+                lines.append(f"{sample_name}{_format_labels(labels)} {value}")
+
+        with self._lock:
+            family(
+                "goal_tracker_http_requests_total",
+                "counter",
+                "Requests handled, by endpoint, method and status code.",
+                (
+                    (
+                        "goal_tracker_http_requests_total",
+                        {"endpoint": endpoint, "method": method, "status": status},
+                        count,
+                    )
+                    for (endpoint, method, status), count in sorted(
+                        self.requests.items()
+                    )
+                ),
+            )
+            family(
+                "goal_tracker_http_requests_in_flight",
+                "gauge",
+                "Requests being handled.",
+                [("goal_tracker_http_requests_in_flight", {}, self.in_flight)],
+            )
+            for name, help_text, histograms in (
+                (
+                    "goal_tracker_http_request_duration_seconds",
+                    "Request latency, by endpoint.",
+                    self.latencies,
+                ),
+                (
+                    "goal_tracker_sql_queries_per_request",
+                    "SQL statements executed per request, by endpoint.",
+                    self.query_counts,
+                ),
+                (
+                    "goal_tracker_sql_duration_seconds_per_request",
+                    "Time spent executing SQL statements per request, by endpoint.",
+                    self.query_durations,
+                ),
+            ):
+                family(
+                    name,
+                    "histogram",
+                    help_text,
+                    (
+                        sample
+                        for endpoint, histogram in sorted(histograms.items())
+                        for sample in histogram.samples(name, {"endpoint": endpoint})
+                    ),
+                )
+
+        stats = [(cache_name, cache.stats()) for cache_name, cache in caches]
+        for key in ("hits", "misses"):
+            family(
+                f"goal_tracker_cache_{key}_total",
+                "counter",
+                f"Cache {key}, by cache.",
+                (
+                    (f"goal_tracker_cache_{key}_total", {"cache": name}, s[key])
+                    for name, s in stats
+                ),
+            )
+        family(
+            "goal_tracker_cache_bytes",
+            "gauge",
+            "The (reported) size of the cached entries, by cache.",
+            (
+                ("goal_tracker_cache_bytes", {"cache": name}, s["bytes"])
+                for name, s in stats
+            ),
+        )
+
+        if pool is not None and "size" in pool:
+            family(
+                "goal_tracker_db_pool_size",
+                "gauge",
+                "The size of the database connection pool.",
+                [("goal_tracker_db_pool_size", {}, pool["size"])],
+            )
+            family(
+                "goal_tracker_db_pool_connections",
+                "gauge",
+                "Pooled database connections, by state.",
+                (
+                    ("goal_tracker_db_pool_connections", {"state": state}, pool[state])
+                    for state in ("checked_in", "checked_out", "overflow")
+                ),
+            )
+
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(
+        f'{key}="{_escape_label_value(str(value))}"' for key, value in labels.items()
+    )
+    return "{" + pairs + "}"
+
+
+def _escape_label_value(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def init_app(app):
+    """Instrument the app, if `METRICS_ENABLED` is set (and do nothing otherwise)."""
+    if not app.config["METRICS_ENABLED"]:
+        return
+
+    app.metrics = Metrics()
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule("/metrics", "metrics", _metrics_view)
+
+    # Listen to all engines (rather than to the app's own one, which may not even
+    # have been created yet); the listeners only count the statements, which
+    # are executed while handling requests of instrumented apps.
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _before_request():
+    current_app.metrics.request_started()
+    g.metrics_started_at = time.perf_counter()
+    g.metrics_n_queries = 0
+    g.metrics_query_duration = 0.0
+
+
+def _after_request(response):
+    if "metrics_started_at" not in g:
+        # An earlier `before_request` function has failed.
+        return response
+    current_app.metrics.observe_request(
+        request.endpoint or "<unmatched>",
+        request.method,
+        response.status_code,
+        time.perf_counter() - g.metrics_started_at,
+        g.metrics_n_queries,
+        g.metrics_query_duration,
+    )
+    return response
+
+
+def _teardown_request(exc):
+    # (This also runs if the request failed with an unhandled exception.)
+    if g.pop("metrics_started_at", None) is not None:
+        current_app.metrics.request_finished()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["metrics_started_at"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Statements executed outside of requests (e.g. by CLI commands) aren't recorded.
+    if has_request_context() and "metrics_n_queries" in g:
+        g.metrics_n_queries += 1
+        g.metrics_query_duration += (
+            time.perf_counter() - conn.info["metrics_started_at"]
+        )
+
+
+def _metrics_view():
+    body = current_app.metrics.render(
+        caches=[
+            ("principal", current_app.principal_cache),
+            ("response", current_app.response_cache),
+        ],
+        pool=pool_stats(db.engine),
+    )
+    return Response(body, content_type="text/plain; version=0.0.4; charset=utf-8")
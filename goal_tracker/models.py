@@ -1,8 +1,11 @@
-from datetime import datetime
+import base64
+import json
+from datetime import datetime, timedelta
+
 from flask import current_app, url_for
-from werkzeug.security import generate_password_hash, check_password_hash
 
 from goal_tracker import db
+from goal_tracker.utils import format_time
 
 
 class PaginatedAPIMixin(object):
@@ -11,8 +14,25 @@ class PaginatedAPIMixin(object):
     generating a representation for a collection of resources.
     """
 
-    @staticmethod
-    def to_collection_dict(query, per_page, page, endpoint, **kwargs):
+    # If set, collections are fetched as tuples of just these columns (rather than
+    # as fully-fledged ORM instances), which `row_to_dict` then serializes.
+    projection_columns = None
+
+    @classmethod
+    def project(cls, query):
+        """
+        Returns:
+            (tuple): the query restricted to `projection_columns` (if set),
+                and a function, which serializes each of the query's results
+        """
+        if cls.projection_columns is None:
+            return query, lambda resource: resource.to_dict()
+        columns = [getattr(cls, name) for name in cls.projection_columns]
+        return query.with_entities(*columns), cls.row_to_dict
+
+    @classmethod
+    def to_collection_dict(cls, query, per_page, page, endpoint, **kwargs):
+        query, serialize = cls.project(query)
         pagination_obj = query.paginate(page=page, per_page=per_page, error_out=False)
 
         # With regard to the `endpoint` parameter passed in to the calls of `url_for`
@@ -37,7 +57,7 @@ class PaginatedAPIMixin(object):
         )
 
         resource_representations = {
-            "items": [resource.to_dict() for resource in pagination_obj.items],
+            "items": [serialize(resource) for resource in pagination_obj.items],
             "_meta": {
                 "total_items": pagination_obj.total,
                 "per_page": per_page,
@@ -54,6 +74,169 @@ class PaginatedAPIMixin(object):
         }
         return resource_representations
 
+    # The columns, by which `to_keyset_collection_dict` orders resources.
+    # (The last one must be unique, so that the ordering is total.)
+    keyset_columns = ("id",)
+
+    @classmethod
+    def to_keyset_collection_dict(
+        cls,
+        query,
+        per_page,
+        endpoint,
+        after=None,
+        before=None,
+        descending=False,
+        **kwargs,
+    ):
+        """
+        Generate a representation for a "page" of resources, which directly
+        follows the `after` cursor (or directly precedes the `before` cursor)
+        in the order given by `keyset_columns` (reversed, if `descending`).
+
+        Unlike `to_collection_dict`, this neither counts all resources nor skips
+        an OFFSET's worth of rows, so its cost doesn't grow with the page's depth
+        and concurrent inserts don't shift the pages.
+        An empty `after` cursor denotes the first page.
+
+        Raises:
+            ValueError: if the provided cursor is invalid
+        """
+        columns = [getattr(cls, name) for name in cls.keyset_columns]
+        query, serialize = cls.project(query)
+
+        if before is not None:
+            key = cls.decode_cursor(before)
+            rows = (
+                query.filter(_keyset_predicate(columns, key, descending=not descending))
+                .order_by(*_keyset_order_by(columns, descending=not descending))
+                .limit(per_page + 1)
+                .all()
+            )
+            has_prev = len(rows) > per_page
+            items = rows[:per_page][::-1]
+            has_next = len(items) > 0
+        else:
+            if after:
+                key = cls.decode_cursor(after)
+                query = query.filter(
+                    _keyset_predicate(columns, key, descending=descending)
+                )
+            rows = (
+                query.order_by(*_keyset_order_by(columns, descending=descending))
+                .limit(per_page + 1)
+                .all()
+            )
+            items = rows[:per_page]
+            has_next = len(rows) > per_page and len(items) > 0
+            has_prev = bool(after) and len(items) > 0
+
+        if before is not None:
+            link_to_self = url_for(endpoint, per_page=per_page, before=before, **kwargs)
+        else:
+            link_to_self = url_for(
+                endpoint, per_page=per_page, after=after or "", **kwargs
+            )
+        link_to_next = (
+            url_for(
+                endpoint,
+                per_page=per_page,
+                after=cls.encode_cursor(items[-1]),
+                **kwargs,
+            )
+            if has_next
+            else None
+        )
+        link_to_prev = (
+            url_for(
+                endpoint,
+                per_page=per_page,
+                before=cls.encode_cursor(items[0]),
+                **kwargs,
+            )
+            if has_prev
+            else None
+        )
+        link_to_first = url_for(endpoint, per_page=per_page, after="", **kwargs)
+
+        resource_representations = {
+            "items": [serialize(resource) for resource in items],
+            "_meta": {
+                "per_page": per_page,
+            },
+            "_links": {
+                "self": link_to_self,
+                "next": link_to_next,
+                "prev": link_to_prev,
+                "first": link_to_first,
+            },
+        }
+        return resource_representations
+
+    @classmethod
+    def encode_cursor(cls, resource):
+        """
+        Returns:
+            (str): an opaque cursor, which points to the given resource
+        """
+        values = []
+        for name in cls.keyset_columns:
+            value = getattr(resource, name)
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            values.append(value)
+        return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode(
+            "utf-8"
+        )
+
+    @classmethod
+    def decode_cursor(cls, cursor):
+        """
+        Returns:
+            (list): the values of the keyset columns, which the cursor points to
+
+        Raises:
+            ValueError: if the cursor is invalid
+        """
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode("utf-8")))
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid cursor: {cursor!r}")
+        if not isinstance(values, list) or len(values) != len(cls.keyset_columns):
+            raise ValueError(f"invalid cursor: {cursor!r}")
+
+        key = []
+        for name, value in zip(cls.keyset_columns, values):
+            python_type = getattr(cls, name).type.python_type
+            if python_type is datetime and isinstance(value, str):
+                value = datetime.fromisoformat(value)
+            elif type(value) is not python_type:
+                raise ValueError(f"invalid cursor: {cursor!r}")
+            key.append(value)
+        return key
+
+
+def _keyset_order_by(columns, descending=False):
+    return [c.desc() for c in columns] if descending else columns
+
+
+def _keyset_predicate(columns, key, descending=False):
+    """
+    Build the condition "(c_1, ..., c_n) > (k_1, ..., k_n)" (or "<", if
+    `descending`) in its expanded form, which any database can serve from an index.
+    """
+    column, value = columns[0], key[0]
+    beyond = column < value if descending else column > value
+    if len(columns) == 1:
+        return beyond
+    return db.or_(
+        beyond,
+        db.and_(
+            column == value,
+            _keyset_predicate(columns[1:], key[1:], descending=descending),
+        ),
+    )
+
 
 class User(db.Model):
     __tablename__ = "users"
@@ -67,6 +250,10 @@ class User(db.Model):
         default=datetime.utcnow,
         onupdate=datetime.utcnow,
     )
+    # Incremented whenever any of the user's goals or intervals changes
+    # (see `bump_data_version`), so that it can serve as a cheap validator
+    # for the representations of those resources.
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     goals = db.relationship(
         "Goal",
@@ -74,23 +261,110 @@ class User(db.Model):
         backref="user",
         cascade="all, delete, delete-orphan",
     )
+    refresh_tokens = db.relationship(
+        "RefreshToken",
+        lazy="dynamic",
+        backref="user",
+        cascade="all, delete, delete-orphan",
+    )
 
     def set_password_hash(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = current_app.password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return current_app.password_hasher.verify(self.password_hash, password)
+
+    def needs_password_rehash(self):
+        return current_app.password_hasher.needs_rehash(self.password_hash)
 
     def __repr__(self):
         return f"<User {self.email}>"
 
+    @classmethod
+    def bump_data_version(cls, user_id):
+        """
+        Record that some of the goals or intervals of a user have changed.
+
+        A single UPDATE statement is emitted (without loading the user), and
+        `users.updated_at` is deliberately left alone.
+
+        NB! The caller is responsible for committing the database session.
+
+        Args:
+            user_id (int): the ID of a user
+        """
+        table = cls.__table__
+        db.session.execute(
+            table.update()
+            .where(table.c.id == user_id)
+            .values(
+                data_version=table.c.data_version + 1, updated_at=table.c.updated_at
+            )
+        )
+
+    @classmethod
+    def get_data_version(cls, user_id):
+        return db.session.query(cls.data_version).filter(cls.id == user_id).scalar()
+
     def generate_token(self):
         token = current_app.token_serializer.dumps({"user_id": self.id}).decode("utf-8")
         return token
 
+    def generate_refresh_token(self):
+        """
+        Issue a refresh token, which remains valid until it either expires or
+        gets revoked (by deleting the returned record).
+
+        The records of the user's expired refresh tokens are deleted along the way
+        (revoked ones are deleted right away), so the table doesn't grow without
+        bound.
+
+        NB! The caller is responsible for committing the database session.
+        """
+        expired_before = datetime.utcnow() - timedelta(
+            seconds=current_app.config["REFRESH_TOKEN_EXPIRES_IN"]
+        )
+        RefreshToken.query.filter(
+            RefreshToken.user_id == self.id, RefreshToken.created_at < expired_before
+        ).delete(synchronize_session=False)
+
+        refresh_token = RefreshToken()
+        self.refresh_tokens.append(refresh_token)
+        db.session.flush()
+        return refresh_token
+
+
+class RefreshToken(db.Model):
+    __tablename__ = "refresh_tokens"
+
+    id = db.Column(db.Integer, primary_key=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), index=True)
+
+    def __repr__(self):
+        return f"<RefreshToken {self.id} (user_id={self.user_id})>"
+
+    def to_token(self):
+        token = current_app.refresh_token_serializer.dumps(
+            {"refresh_token_id": self.id}
+        ).decode("utf-8")
+        return token
+
+    def generate_access_token(self):
+        # Equivalent to `self.user.generate_token()`,
+        # but without loading the user from the database.
+        token = current_app.token_serializer.dumps({"user_id": self.user_id}).decode(
+            "utf-8"
+        )
+        return token
+
 
 class Goal(db.Model):
     __tablename__ = "goals"
+    __table_args__ = (
+        db.Index("ix_goals_user_id_description", "user_id", "description", unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     description = db.Column(db.String(256))
@@ -101,7 +375,7 @@ class Goal(db.Model):
         onupdate=datetime.utcnow,
     )
 
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"))
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), index=True)
 
     intervals = db.relationship(
         "Interval",
@@ -109,6 +383,11 @@ class Goal(db.Model):
         backref="goal",
         cascade="all, delete, delete-orphan",
     )
+    daily_totals = db.relationship(
+        "DailyGoalTotal",
+        lazy="dynamic",
+        cascade="all, delete, delete-orphan",
+    )
 
     def __repr__(self):
         return f"<Goal '{self.description}'>"
@@ -116,6 +395,14 @@ class Goal(db.Model):
 
 class Interval(PaginatedAPIMixin, db.Model):
     __tablename__ = "intervals"
+    __table_args__ = (db.Index("ix_intervals_goal_id_start", "goal_id", "start"),)
+
+    # How long an interval may last. (The API rejects longer ones, and
+    # `overlaps` relies on this bound.)
+    MAX_DURATION = timedelta(hours=24)
+
+    keyset_columns = ("start", "id")
+    projection_columns = ("id", "goal_id", "start", "final")
 
     id = db.Column(db.Integer, primary_key=True)
     start = db.Column(db.DateTime)  # TODO: consider adding `nullable=False`
@@ -132,10 +419,91 @@ class Interval(PaginatedAPIMixin, db.Model):
     def __repr__(self):
         return f"<Interval {self.id} (goal={self.goal})>"
 
+    @classmethod
+    def query_owned_by(cls, user_id):
+        """
+        Args:
+            user_id (int): the ID of a user
+
+        Returns:
+            (flask_sqlalchemy.BaseQuery): a query for all of the user's intervals,
+                which is scoped by a join (instead of by materializing the IDs of
+                all the user's goals)
+        """
+        return cls.query.join(Goal, Goal.id == cls.goal_id).filter(
+            Goal.user_id == user_id
+        )
+
+    @classmethod
+    def is_owned_by(cls, user_id):
+        """
+        Args:
+            user_id (int): the ID of a user
+
+        Returns:
+            a SQL condition, which holds for the user's intervals
+            (expressed via a subquery, so that it can be used in bulk UPDATE and
+            DELETE statements, which don't support joins)
+        """
+        return cls.goal_id.in_(
+            db.session.query(Goal.id).filter(Goal.user_id == user_id)
+        )
+
+    @classmethod
+    def overlaps(cls, start, final):
+        """
+        Args:
+            start, final (datetime.datetime): the endpoints of a time window
+
+        Returns:
+            a SQL condition, which holds for the intervals overlapping the window
+
+        An overlapping interval starts before the window ends, and (since it lasts
+        at most `MAX_DURATION`) less than `MAX_DURATION` before the window starts.
+        That redundant lower bound turns the condition on "start" into a range,
+        which the index on `intervals(goal_id, start)` scans tightly - wherever
+        the window lies in the user's history. (The condition on "final" merely
+        filters the rows within that range.)
+        """
+        return db.and_(
+            cls.start < final,
+            cls.start > start - cls.MAX_DURATION,
+            cls.final > start,
+        )
+
     def to_dict(self):
+        return self.row_to_dict(self)
+
+    @staticmethod
+    def row_to_dict(row):
+        """
+        Args:
+            row: an `Interval` or a tuple of the columns in `projection_columns`
+                (which offers the same attributes)
+        """
         return {
-            "id": self.id,
-            "goal_id": self.goal_id,
-            "start": self.start.strftime("%Y-%m-%d %H:%M"),
-            "final": self.final.strftime("%Y-%m-%d %H:%M"),
+            "id": row.id,
+            "goal_id": row.goal_id,
+            "start": format_time(row.start),
+            "final": format_time(row.final),
         }
+
+
+class DailyGoalTotal(db.Model):
+    """
+    A rollup of the intervals of one goal on one (calendar) day.
+
+    An interval, which crosses midnight, contributes to the `seconds` of each day
+    it overlaps, but only to the `count` of the day it starts on.
+    The rows are maintained by `goal_tracker.rollups`.
+    """
+
+    __tablename__ = "daily_goal_totals"
+
+    goal_id = db.Column(db.Integer, db.ForeignKey("goals.id"), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    seconds = db.Column(db.Integer, nullable=False, default=0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DailyGoalTotal goal_id={self.goal_id} day={self.day}>"
@@ -0,0 +1,102 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from werkzeug.security import (
+    DEFAULT_PBKDF2_ITERATIONS,
+    check_password_hash,
+    generate_password_hash,
+)
+
+
+class PasswordHasherBusy(Exception):
+    """
+    Raised when too many hashing jobs are already waiting for a worker
+    (or when a job takes longer than allowed).
+    """
+
+
+class PasswordHasher(object):
+    """
+    Hashes and verifies passwords according to a configurable policy.
+
+    The (deliberately expensive) key-derivation work is carried out by a bounded
+    pool of worker threads. At most `max_workers + max_pending` jobs may be
+    in flight at any time; a caller, who finds no free slot, or whose job isn't
+    done within `timeout` seconds, gets a `PasswordHasherBusy` exception instead
+    of piling up behind a burst of logins.
+    """
+
+    def __init__(
+        self,
+        method="pbkdf2:sha256",
+        iterations=150000,
+        salt_length=8,
+        max_workers=4,
+        max_pending=16,
+        timeout=None,
+    ):
+        # With regard to the format of the `method` argument, which is accepted by
+        # `werkzeug.security.generate_password_hash`, here is what the Werkzeug
+        # documentation says:
+        #   "pbkdf2:sha256:80000$salt$hash"
+        # (The number of iterations is appended only once, and Werkzeug's default
+        # is made explicit, so that the method equals the prefix of the hashes.)
+        if method.startswith("pbkdf2:") and method.count(":") == 1:
+            if iterations is None:
+                iterations = DEFAULT_PBKDF2_ITERATIONS
+            method = f"{method}:{iterations}"
+        self.method = method
+        self.salt_length = salt_length
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="password-hasher"
+        )
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._timeout = timeout
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            method=config["PASSWORD_HASH_METHOD"],
+            iterations=config["PASSWORD_HASH_ITERATIONS"],
+            salt_length=config["PASSWORD_HASH_SALT_LENGTH"],
+            max_workers=config["PASSWORD_HASH_WORKERS"],
+            max_pending=config["PASSWORD_HASH_MAX_PENDING"],
+            timeout=config["PASSWORD_HASH_TIMEOUT"],
+        )
+
+    def hash(self, password):
+        return self._run(
+            generate_password_hash,
+            password,
+            method=self.method,
+            salt_length=self.salt_length,
+        )
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """
+        Args:
+            password_hash (str): a hash created by `hash`
+
+        Returns:
+            (bool): whether the hash was created according to an outdated policy
+        """
+        return password_hash.split("$", 1)[0] != self.method
+
+    def _run(self, fn, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is held until the job is done (even if the caller stops waiting).
+        future.add_done_callback(lambda __: self._slots.release())
+        try:
+            return future.result(timeout=self._timeout)
+        except TimeoutError:
+            raise PasswordHasherBusy()
@@ -0,0 +1,142 @@
+"""
+Opt-in profiling of requests by means of `cProfile`.
+
+If `PROFILING_ENABLED` is set, a fraction (`PROFILING_SAMPLE_RATE`) of the requests,
+as well as every request whose `PROFILING_HEADER` header carries `PROFILING_SECRET`,
+is profiled. Each profile is dumped (in the `pstats` format) into a subdirectory of
+`PROFILING_DIR`, which is named after the request's endpoint.
+
+`collapse_profiles` aggregates such profiles into the "collapsed stack" format,
+which `flamegraph.pl` (and speedscope etc.) take as input.
+"""
+import cProfile
+import glob
+import hmac
+import os
+import pstats
+import random
+import time
+import uuid
+
+from flask import current_app, g, request
+
+
+def init_app(app):
+    """Profile requests, if `PROFILING_ENABLED` is set (and do nothing otherwise)."""
+    if not app.config["PROFILING_ENABLED"]:
+        return
+
+    app.before_request(_before_request)
+    app.teardown_request(_teardown_request)
+
+
+def _should_profile():
+    secret = current_app.config["PROFILING_SECRET"]
+    header = request.headers.get(current_app.config["PROFILING_HEADER"])
+    if secret and header and hmac.compare_digest(header, secret):
+        return True
+    return random.random() < current_app.config["PROFILING_SAMPLE_RATE"]
+
+
+def _before_request():
+    if not _should_profile():
+        return
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is already active (e.g. a debugger's).
+        return
+    g.profiler = profiler
+
+
+def _teardown_request(exc):
+    # (This also runs if the request failed with an unhandled exception.)
+    profiler = g.pop("profiler", None)
+    if profiler is None:
+        return
+    profiler.disable()
+
+    directory = os.path.join(
+        current_app.config["PROFILING_DIR"], request.endpoint or "_unmatched"
+    )
+    os.makedirs(directory, exist_ok=True)
+    filename = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.prof"
+    profiler.dump_stats(os.path.join(directory, filename))
+
+
+def profile_paths(directory, endpoints=None):
+    """
+    Args:
+        directory (str): the value of `PROFILING_DIR`
+        endpoints (list): the endpoints, whose profiles to return (default: all)
+
+    Returns:
+        (list): the paths of the profiles, which have been dumped into `directory`
+    """
+    if not endpoints:
+        return sorted(glob.glob(os.path.join(directory, "*", "*.prof")))
+    return sorted(
+        path
+        for endpoint in endpoints
+        for path in glob.glob(os.path.join(directory, endpoint, "*.prof"))
+    )
+
+
+def collapse_profiles(paths):
+    """
+    Aggregate profiles into collapsed stacks.
+
+    A `pstats` profile records the time spent in each function, and the cumulative
+    time of each caller-callee edge - but not the complete stacks. Therefore, the
+    stacks are reconstructed by walking the call graph from its roots, and the time
+    spent in a function is apportioned to the paths leading to it in proportion to
+    the cumulative times of the edges along those paths. (Recursive calls are cut.)
+
+    Args:
+        paths (list): the paths of profiles in the `pstats` format
+
+    Returns:
+        (dict): a mapping from stacks of the form "root;...;leaf"
+            to the time spent in their leaves (in microseconds)
+    """
+    stats = pstats.Stats(*paths).stats
+    callees = {}
+    for func, (__, __, __, __, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, {})[func] = edge
+
+    collapsed = {}
+
+    def walk(func, stack, share):
+        own_time = stats[func][2] * share
+        if own_time > 0:
+            key = ";".join(_frame_label(f) for f in stack)
+            collapsed[key] = collapsed.get(key, 0) + own_time
+        for callee, edge in callees.get(func, {}).items():
+            # (Subtrees, which account for less than a microsecond along this path,
+            # are pruned, lest the number of paths explode.)
+            if callee in stack or share * edge[3] < 1e-6:
+                continue
+            walk(callee, stack + [callee], share * edge[3] / stats[callee][3])
+
+    for func, (__, __, __, __, callers) in stats.items():
+        if not callers:
+            walk(func, [func], 1.0)
+
+    return {
+        stack: round(seconds * 1e6)
+        for stack, seconds in collapsed.items()
+        if round(seconds * 1e6) > 0
+    }
+
+
+def _frame_label(func):
+    filename, line, name = func
+    if filename == "~":
+        # A built-in function (whose name is something like "<built-in method ...>").
+        label = name
+    else:
+        label = f"{name} ({os.path.basename(filename)}:{line})"
+    return label.replace(";", ",")
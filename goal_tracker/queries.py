@@ -0,0 +1,114 @@
+"""
+Counting of the SQL statements, which are executed on behalf of a block of code
+or of a request.
+
+- `count_queries` is meant for tests, which assert a query budget.
+- `init_app` makes the app log a warning whenever a request executes the same
+  statement "shape" more than `QUERY_REPEAT_WARNING_THRESHOLD` times, which is
+  the telltale sign of an N+1 pattern (e.g. a chain of lazy loads in a loop).
+"""
+import contextlib
+import re
+import threading
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# Expanded IN lists (and multi-row VALUES clauses) differ only in the number
+# of their placeholders, so they are collapsed into a single one.
+_PLACEHOLDER = r"\s*(?:\?|%s|%\(\w+\)s)\s*"
+_PLACEHOLDER_LIST = re.compile(rf"\((?:{_PLACEHOLDER},)+{_PLACEHOLDER}\)")
+
+_local = threading.local()
+
+
+def statement_shape(statement):
+    """
+    Returns:
+        (str): the statement, with runs of placeholders collapsed into one
+    """
+    return _PLACEHOLDER_LIST.sub("(?)", statement)
+
+
+class QueryLog(object):
+    """The statements, which have been executed within a `count_queries` block."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __len__(self):
+        return len(self.statements)
+
+
+@contextlib.contextmanager
+def count_queries():
+    """
+    Record the SQL statements, which the current thread executes (on any engine)
+    within the `with` block.
+
+    Yields:
+        (QueryLog)
+    """
+    _install_listener()
+    query_log = QueryLog()
+    logs = getattr(_local, "query_logs", None)
+    if logs is None:
+        logs = _local.query_logs = []
+    logs.append(query_log)
+    try:
+        yield query_log
+    finally:
+        logs.remove(query_log)
+
+
+def init_app(app):
+    """
+    Warn about repeated statements, if `QUERY_REPEAT_WARNING_THRESHOLD` is set
+    (and do nothing otherwise).
+    """
+    if not app.config["QUERY_REPEAT_WARNING_THRESHOLD"]:
+        return
+
+    _install_listener()
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+
+
+def _install_listener():
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    for query_log in getattr(_local, "query_logs", ()):
+        query_log.statements.append(statement)
+
+    if has_request_context() and "query_shapes" in g:
+        shape = statement_shape(statement)
+        g.query_shapes[shape] = g.query_shapes.get(shape, 0) + 1
+
+
+def _before_request():
+    g.query_shapes = {}
+
+
+def _after_request(response):
+    query_shapes = g.pop("query_shapes", None)
+    if not query_shapes:
+        return response
+
+    threshold = current_app.config["QUERY_REPEAT_WARNING_THRESHOLD"]
+    for shape, count in query_shapes.items():
+        if count > threshold:
+            current_app.logger.warning(
+                "%s %s (endpoint %s) executed the same statement %d times,"
+                " which suggests an N+1 query pattern: %s",
+                request.method,
+                request.path,
+                request.endpoint,
+                count,
+                shape,
+            )
+    return response
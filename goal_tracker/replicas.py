@@ -0,0 +1,69 @@
+"""
+Routing of reads to read replicas of the database.
+
+If `DATABASE_REPLICA_URLS` is set, every replica becomes a bind ("replica_0",
+"replica_1", ...), and the GET handlers decorated with
+`goal_tracker.api.reads_from_replica` execute their statements on one of them
+(chosen at random, once per request). Everything else - authentication, writes,
+and the handlers of all other requests - keeps using the primary database.
+
+Replicas lag behind the primary, so a user's reads are only routed to a replica,
+whose copy of the user's `data_version` matches the primary's (see
+`goal_tracker.api.reads_from_replica`); otherwise, the user has written something,
+which hasn't been replicated yet, and the reads stay on the primary. Because the
+versions live in the database, this holds across any number of worker processes.
+"""
+import random
+
+from flask import current_app, g, has_request_context
+from flask_sqlalchemy import SignallingSession, get_state
+
+
+class RoutingSession(SignallingSession):
+    """
+    A session, which executes statements on the replica that the current request
+    has been assigned to (if any) - unless they write.
+    """
+
+    def get_bind(self, mapper=None, clause=None):
+        bind_key = None
+        if not self._flushing and not getattr(clause, "is_dml", False):
+            bind_key = _current_replica()
+        if bind_key is not None:
+            return get_state(self.app).db.get_engine(self.app, bind=bind_key)
+        return super().get_bind(mapper, clause)
+
+
+def _current_replica():
+    if has_request_context():
+        return g.get("replica_bind_key")
+    return None
+
+
+def init_app(app):
+    """
+    Set up the replica binds, if `DATABASE_REPLICA_URLS` is set
+    (and do nothing otherwise).
+    """
+    urls = app.config["DATABASE_REPLICA_URLS"]
+    if not urls:
+        return
+
+    binds = {f"replica_{i}": url for i, url in enumerate(urls)}
+    app.config["SQLALCHEMY_BINDS"] = {
+        **(app.config.get("SQLALCHEMY_BINDS") or {}),
+        **binds,
+    }
+    app.replica_bind_keys = list(binds)
+
+
+def choose_replica():
+    """
+    Returns:
+        (str or None): the key of a (randomly chosen) replica bind,
+            or None if there are no replicas
+    """
+    bind_keys = getattr(current_app, "replica_bind_keys", None)
+    if not bind_keys:
+        return None
+    return random.choice(bind_keys)
@@ -0,0 +1,215 @@
+"""
+Incremental maintenance of the `daily_goal_totals` rollup table.
+
+Every code path, which creates, changes or deletes intervals, must report the
+affected intervals to `update_daily_totals` before committing, so that the
+rollup is updated within the same transaction.
+"""
+import datetime
+
+from sqlalchemy.dialects import mysql
+
+from goal_tracker import db
+from goal_tracker.models import DailyGoalTotal, Goal, Interval
+
+
+def split_by_day(start, final):
+    """
+    Split an interval at every midnight, which it crosses.
+
+    Args:
+        start, final (datetime.datetime): the endpoints of an interval
+
+    Yields:
+        (tuple): triples of the form (day, seconds, count), where `count` is 1 for
+            the day, on which the interval starts, and 0 for every other day
+    """
+    day = start.date()
+    piece_start = start
+    count = 1
+    while True:
+        next_midnight = datetime.datetime.combine(
+            day + datetime.timedelta(days=1), datetime.time()
+        )
+        if final <= next_midnight:
+            # NB! This also covers intervals, which end before they start.
+            yield day, int((final - piece_start).total_seconds()), count
+            return
+        yield day, int((next_midnight - piece_start).total_seconds()), count
+        day += datetime.timedelta(days=1)
+        piece_start = next_midnight
+        count = 0
+
+
+def compute_deltas(added=(), removed=()):
+    """
+    Args:
+        added, removed: iterables of triples of the form (goal_id, start, final)
+
+    Returns:
+        (dict): a mapping of the form {(goal_id, day): [seconds, count]}
+    """
+    deltas = {}
+    for sign, rows in ((1, added), (-1, removed)):
+        for goal_id, start, final in rows:
+            for day, seconds, count in split_by_day(start, final):
+                delta = deltas.setdefault((goal_id, day), [0, 0])
+                delta[0] += sign * seconds
+                delta[1] += sign * count
+    return deltas
+
+
+def update_daily_totals(added=(), removed=()):
+    """
+    Apply the effect of adding and removing intervals to the rollup table.
+
+    NB! The caller is responsible for committing the database session.
+
+    Args:
+        added, removed: iterables of triples of the form (goal_id, start, final)
+    """
+    deltas = compute_deltas(added=added, removed=removed)
+    if not deltas:
+        return
+
+    # Make sure that the (not yet flushed) intervals reach the database
+    # in the same transaction as the rollup.
+    db.session.flush()
+
+    rows = [
+        {"goal_id": goal_id, "day": day, "seconds": seconds, "count": count}
+        for (goal_id, day), (seconds, count) in deltas.items()
+        if seconds != 0 or count != 0
+    ]
+    if not rows:
+        return
+
+    # Each step is a single (executemany) statement, however many rows are affected.
+    table = DailyGoalTotal.__table__
+    if db.engine.dialect.name == "mysql":
+        # An upsert avoids a race between concurrent first writes to a row.
+        insert_stmt = mysql.insert(table)
+        db.session.execute(
+            insert_stmt.on_duplicate_key_update(
+                seconds=table.c.seconds + insert_stmt.inserted.seconds,
+                count=table.c.count + insert_stmt.inserted.count,
+            ),
+            rows,
+        )
+    else:
+        # Most deltas apply to existing rows, so those are updated first; the missing
+        # rows are then inserted (and looked up only if the rowcount is inconclusive).
+        result = db.session.execute(
+            table.update()
+            .where(
+                db.and_(
+                    table.c.goal_id == db.bindparam("b_goal_id"),
+                    table.c.day == db.bindparam("b_day"),
+                )
+            )
+            .values(
+                seconds=table.c.seconds + db.bindparam("b_seconds"),
+                count=table.c.count + db.bindparam("b_count"),
+            ),
+            [_prefixed(row) for row in rows],
+        )
+        n_updated = (
+            result.rowcount if db.engine.dialect.supports_sane_multi_rowcount else None
+        )
+        if n_updated == 0:
+            inserts = rows
+        elif n_updated == len(rows):
+            inserts = []
+        else:
+            existing_keys = set(
+                db.session.query(DailyGoalTotal.goal_id, DailyGoalTotal.day).filter(
+                    DailyGoalTotal.goal_id.in_({row["goal_id"] for row in rows}),
+                    DailyGoalTotal.day.between(
+                        min(row["day"] for row in rows),
+                        max(row["day"] for row in rows),
+                    ),
+                )
+            )
+            inserts = [
+                row for row in rows if (row["goal_id"], row["day"]) not in existing_keys
+            ]
+        if inserts:
+            db.session.execute(table.insert(), inserts)
+
+    removals = [row for row in rows if row["seconds"] < 0 or row["count"] < 0]
+    if removals:
+        # Don't keep rows around, which no longer account for any interval.
+        db.session.execute(
+            table.delete().where(
+                db.and_(
+                    table.c.goal_id == db.bindparam("b_goal_id"),
+                    table.c.day == db.bindparam("b_day"),
+                    table.c.seconds == 0,
+                    table.c.count == 0,
+                )
+            ),
+            [_prefixed(row) for row in removals],
+        )
+
+
+def _prefixed(row):
+    # (The names of bound parameters must differ from those of the columns,
+    # which an UPDATE statement assigns to.)
+    return {f"b_{key}": value for key, value in row.items()}
+
+
+def rebuild_daily_totals(chunk_size=1000):
+    """
+    Recompute the whole rollup table from the `intervals` table.
+
+    Goals are processed one at a time (and their IDs are fetched in chunks),
+    so only the totals of a single goal need to be held in memory at any time.
+    Each goal's rows are deleted and re-inserted in a transaction of its own, so
+    readers never see a goal without its totals, and the API may stay online.
+
+    Returns:
+        (int): the number of rows written to the rollup table
+    """
+    table = DailyGoalTotal.__table__
+
+    n_rows = 0
+    last_goal_id = 0
+    while True:
+        goal_ids = [
+            goal_id
+            for (goal_id,) in db.session.query(Goal.id)
+            .filter(Goal.id > last_goal_id)
+            .order_by(Goal.id)
+            .limit(chunk_size)
+        ]
+        if not goal_ids:
+            break
+        last_goal_id = goal_ids[-1]
+
+        for goal_id in goal_ids:
+            db.session.execute(table.delete().where(table.c.goal_id == goal_id))
+            intervals = db.session.query(
+                Interval.goal_id, Interval.start, Interval.final
+            ).filter(
+                Interval.goal_id == goal_id,
+                Interval.start.isnot(None),
+                Interval.final.isnot(None),
+            )
+            rows = [
+                {"goal_id": goal_id, "day": day, "seconds": seconds, "count": count}
+                for (__, day), (seconds, count) in compute_deltas(
+                    added=intervals
+                ).items()
+            ]
+            if rows:
+                db.session.execute(table.insert(), rows)
+                n_rows += len(rows)
+            db.session.commit()
+
+    # Drop the rows of goals, which no longer exist.
+    db.session.execute(
+        table.delete().where(~table.c.goal_id.in_(db.session.query(Goal.id)))
+    )
+    db.session.commit()
+
+    return n_rows
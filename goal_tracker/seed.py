@@ -0,0 +1,162 @@
+"""
+Generation of large, synthetic (but realistically shaped) datasets for load testing.
+
+The data is generated user by user, from a random number generator seeded with
+both the global seed and the user's ID. Thus, the same arguments always produce
+the same database, independently of the chunk size.
+
+Each user
+- owns a number of goals, which follows a heavy-tailed distribution
+  (most users have a handful of goals, a few have dozens),
+- spends time on those goals with Zipf-like preferences,
+- is active on a user-specific fraction of the days, recording a few
+  non-overlapping sessions per active day, some of which cross midnight.
+"""
+import datetime
+import itertools
+import random
+
+from goal_tracker import db
+from goal_tracker.models import DailyGoalTotal, Goal, Interval, User
+from goal_tracker.rollups import compute_deltas
+
+
+SEED_START = datetime.datetime(2020, 1, 1)
+
+
+def seed_database(
+    password_hash,
+    n_users=1000,
+    max_goals=50,
+    n_days=365,
+    seed=0,
+    chunk_size=10000,
+):
+    """
+    Fill an empty database with a synthetic dataset - including the
+    `daily_goal_totals` rollup, which is computed while the intervals are generated.
+
+    Rows are inserted by means of multi-row INSERT statements, and the session is
+    committed every `chunk_size` rows or so, which keeps the memory usage bounded.
+
+    Args:
+        password_hash (str): the password hash, which all users share
+            (hashing is deliberately slow, so it isn't done once per user)
+
+    Returns:
+        (dict): the number of rows inserted into each table
+
+    Raises:
+        ValueError: if the database already contains users
+    """
+    if db.session.query(User.id).first() is not None:
+        raise ValueError("The database already contains users.")
+
+    writer = ChunkedWriter(
+        [User.__table__, Goal.__table__, Interval.__table__, DailyGoalTotal.__table__],
+        chunk_size,
+    )
+    goal_ids = itertools.count(1)
+    for user_id in range(1, n_users + 1):
+        rng = random.Random(f"{seed}-{user_id}")
+        writer.add(
+            User.__table__,
+            {
+                "id": user_id,
+                "email": f"user{user_id}@example.com",
+                "password_hash": password_hash,
+            },
+        )
+
+        n_goals = min(max_goals, int(rng.paretovariate(1.2)))
+        user_goal_ids = [next(goal_ids) for __ in range(n_goals)]
+        for goal_id in user_goal_ids:
+            writer.add(
+                Goal.__table__,
+                {"id": goal_id, "user_id": user_id, "description": f"goal {goal_id}"},
+            )
+
+        intervals = list(generate_intervals(rng, user_goal_ids, n_days))
+        for goal_id, start, final in intervals:
+            writer.add(
+                Interval.__table__,
+                {"goal_id": goal_id, "start": start, "final": final},
+            )
+        deltas = compute_deltas(added=intervals)
+        for (goal_id, day), (seconds, count) in deltas.items():
+            writer.add(
+                DailyGoalTotal.__table__,
+                {"goal_id": goal_id, "day": day, "seconds": seconds, "count": count},
+            )
+
+    writer.flush()
+    return {table.name: n for table, n in writer.counts.items()}
+
+
+def generate_intervals(rng, goal_ids, n_days):
+    """
+    Yields:
+        (tuple): the intervals of one user, as triples of the form
+            (goal_id, start, final), in chronological order and without overlaps
+    """
+    # Earlier goals are preferred (with weights 1, 1/2, 1/3, ...).
+    cum_weights = list(
+        itertools.accumulate(1 / rank for rank in range(1, len(goal_ids) + 1))
+    )
+    activity = rng.uniform(0.2, 0.9)
+
+    def minutes(n):
+        return datetime.timedelta(minutes=n)
+
+    not_before = SEED_START
+    for day in range(n_days):
+        midnight = SEED_START + datetime.timedelta(days=day)
+        if rng.random() >= activity:
+            continue
+
+        start = max(not_before, midnight + minutes(rng.randint(6 * 60, 21 * 60)))
+        for __ in range(rng.choice((1, 1, 2, 2, 3, 4))):
+            final = start + minutes(min(240, int(rng.expovariate(1 / 50)) + 5))
+            yield rng.choices(goal_ids, cum_weights=cum_weights)[0], start, final
+            start = final + minutes(rng.randint(10, 180))
+
+        # Now and then, a late session runs past midnight.
+        if rng.random() < 0.05:
+            start = max(start, midnight + minutes(rng.randint(22 * 60, 23 * 60 + 45)))
+            final = start + minutes(rng.randint(30, 180))
+            yield rng.choices(goal_ids, cum_weights=cum_weights)[0], start, final
+            start = final
+
+        not_before = start
+
+
+class ChunkedWriter(object):
+    """
+    Buffer rows for several tables, and insert them (in the given order of the
+    tables, which must respect the foreign keys) in chunked transactions.
+
+    (The benchmarks' datasets are written by means of this class, too.)
+    """
+
+    def __init__(self, tables, chunk_size):
+        self.tables = tables
+        self.chunk_size = chunk_size
+        self.buffers = {table: [] for table in tables}
+        self.counts = {table: 0 for table in tables}
+        self.n_buffered = 0
+
+    def add(self, table, row):
+        self.buffers[table].append(row)
+        self.n_buffered += 1
+        if self.n_buffered >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        for table in self.tables:
+            rows = self.buffers[table]
+            if rows:
+                db.session.execute(table.insert(), rows)
+                self.counts[table] += len(rows)
+                self.buffers[table] = []
+        db.session.commit()
+        self.n_buffered = 0
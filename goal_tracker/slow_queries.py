@@ -0,0 +1,193 @@
+"""
+A log of the SQL statements, which take longer than `SLOW_QUERY_THRESHOLD` seconds.
+
+Slow statements are logged (with the endpoint and the user, on whose behalf
+they were executed, and the shapes of their parameters) and aggregated by
+fingerprint, i.e. by `statement_shape`. The first time a SELECT statement with a
+given fingerprint is slow, the database's query plan for it is captured by means
+of `EXPLAIN QUERY PLAN` (SQLite) or `EXPLAIN` (MySQL).
+
+The aggregated entries are kept in memory (per worker process), and can be
+inspected by means of `GET /api/v1.0/admin/slow-queries`.
+"""
+import datetime
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, has_app_context, has_request_context, request
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Engine
+
+from goal_tracker.auth import token_auth
+from goal_tracker.queries import statement_shape
+
+
+EXPLAIN_PREFIXES = {"sqlite": "EXPLAIN QUERY PLAN ", "mysql": "EXPLAIN "}
+
+
+class SlowQueryLog(object):
+    """A bounded, thread-safe collection of slow statements, keyed by fingerprint."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # fingerprint -> dict
+
+    def record(self, statement, duration, parameter_shapes, endpoint, user_id):
+        """
+        Returns:
+            (tuple): the fingerprint of the statement, and whether its query plan
+                still has to be captured (which is the case only once per entry)
+        """
+        shape = statement_shape(statement)
+        fingerprint = hashlib.sha1(shape.encode("utf-8")).hexdigest()[:16]
+        now = datetime.datetime.utcnow().isoformat()
+
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is None:
+                entry = {
+                    "fingerprint": fingerprint,
+                    "statement": shape,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "first_seen": now,
+                    "explain": None,
+                }
+                self._entries[fingerprint] = entry
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.move_to_end(fingerprint)
+
+            entry["count"] += 1
+            entry["total_ms"] += duration * 1000
+            entry["max_ms"] = max(entry["max_ms"], duration * 1000)
+            entry["last_seen"] = now
+            entry["last_endpoint"] = endpoint
+            entry["last_user_id"] = user_id
+            entry["parameter_shapes"] = parameter_shapes
+
+            needs_explain = "explain_pending" not in entry and entry["explain"] is None
+            if needs_explain:
+                entry["explain_pending"] = True
+        return fingerprint, needs_explain
+
+    def set_explain(self, fingerprint, explain):
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is not None:
+                entry["explain"] = explain
+
+    def entries(self):
+        """
+        Returns:
+            (list): the entries, the most expensive (in total) first
+        """
+        with self._lock:
+            entries = [
+                {k: v for k, v in entry.items() if k != "explain_pending"}
+                for entry in self._entries.values()
+            ]
+        return sorted(entries, key=lambda entry: entry["total_ms"], reverse=True)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def init_app(app):
+    """Log slow statements, if `SLOW_QUERY_THRESHOLD` is set (and do nothing otherwise)."""
+    if not app.config["SLOW_QUERY_THRESHOLD"]:
+        return
+
+    app.slow_query_log = SlowQueryLog(app.config["SLOW_QUERY_LOG_MAXSIZE"])
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["slow_query_started_at"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["slow_query_started_at"]
+    if not has_app_context():
+        return
+    slow_query_log = getattr(current_app, "slow_query_log", None)
+    if slow_query_log is None or duration < current_app.config["SLOW_QUERY_THRESHOLD"]:
+        return
+
+    endpoint = request.endpoint if has_request_context() else None
+    user_id = _current_user_id()
+    parameter_shapes = _parameter_shapes(parameters, executemany)
+    current_app.logger.warning(
+        "slow SQL statement (%.1f ms) in %s (user %s): %s %s",
+        duration * 1000,
+        endpoint,
+        user_id,
+        statement,
+        parameter_shapes,
+    )
+
+    fingerprint, needs_explain = slow_query_log.record(
+        statement, duration, parameter_shapes, endpoint, user_id
+    )
+    if needs_explain:
+        slow_query_log.set_explain(
+            fingerprint, _explain(conn, statement, parameters, executemany)
+        )
+
+
+def _current_user_id():
+    if not has_request_context():
+        return None
+    user = token_auth.current_user()
+    if user is None:
+        return None
+    # NB! Don't access `user.id`, which could emit SQL (if `user` has been expired)
+    # while a statement is being executed.
+    identity = inspect(user).identity
+    return identity[0] if identity else None
+
+
+def _parameter_shapes(parameters, executemany):
+    if executemany:
+        if not parameters:
+            return []
+        return {"rows": len(parameters), "row": _parameter_shapes(parameters[0], False)}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    return [type(value).__name__ for value in parameters or ()]
+
+
+def _explain(conn, statement, parameters, executemany):
+    """
+    Returns:
+        (list or None): the rows (as dicts) of the query plan for a SELECT statement
+    """
+    prefix = EXPLAIN_PREFIXES.get(conn.dialect.name)
+    if prefix is None or executemany:
+        return None
+    if not statement.lstrip().upper().startswith("SELECT"):
+        return None
+
+    # Use a raw DBAPI cursor, so that the EXPLAIN statement itself
+    # neither triggers the event listeners nor ends up in the log.
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        columns = [column[0] for column in cursor.description]
+        return [
+            {column: value for column, value in zip(columns, row)}
+            for row in cursor.fetchall()
+        ]
+    except Exception as e:
+        current_app.logger.warning("could not EXPLAIN a slow statement: %s", e)
+        return None
+    finally:
+        cursor.close()
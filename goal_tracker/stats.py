@@ -0,0 +1,131 @@
+"""
+SQL-side aggregation of the time, which has been spent in pursuit of goals.
+
+The `bucket_start` construct compiles to equivalent expressions on SQLite and on
+MySQL, so that bucket boundaries (and thus the reported totals) don't depend on
+the database backend.
+"""
+import datetime
+
+from sqlalchemy import func, literal_column
+from sqlalchemy.exc import CompileError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.types import String
+
+from goal_tracker import db
+from goal_tracker.models import DailyGoalTotal, Goal
+
+
+BUCKETS = ("day", "week", "month")
+
+
+class bucket_start(FunctionElement):
+    """
+    The first day (formatted as "YYYY-MM-DD") of the day, week or month,
+    which a date or timestamp falls into. Weeks start on Mondays.
+    """
+
+    type = String()
+    name = "bucket_start"
+
+    def __init__(self, expr, bucket):
+        if bucket not in BUCKETS:
+            raise ValueError(f"bucket must be one of {BUCKETS}")
+        self.bucket = bucket
+        super().__init__(expr)
+
+
+@compiles(bucket_start)
+def _compile_unsupported(element, compiler, **kw):
+    raise CompileError(
+        f"{element.name} is not supported by the {compiler.dialect.name} dialect"
+    )
+
+
+# Literal (rather than bound) arguments keep the expressions identical
+# wherever they occur in a statement, which matters for GROUP BY clauses.
+
+
+@compiles(bucket_start, "sqlite")
+def _compile_bucket_start_sqlite(element, compiler, **kw):
+    (expr,) = element.clauses
+    if element.bucket == "day":
+        sql_expr = func.date(expr)
+    elif element.bucket == "week":
+        sql_expr = func.date(
+            expr, literal_column("'weekday 0'"), literal_column("'-6 days'")
+        )
+    else:
+        sql_expr = func.strftime(literal_column("'%Y-%m-01'"), expr)
+    return compiler.process(sql_expr, **kw)
+
+
+@compiles(bucket_start, "mysql")
+def _compile_bucket_start_mysql(element, compiler, **kw):
+    (expr,) = element.clauses
+    if element.bucket == "day":
+        sql_expr = func.date_format(expr, literal_column("'%Y-%m-%d'"))
+    elif element.bucket == "week":
+        sql_expr = func.date_format(
+            func.subdate(expr, func.weekday(expr)), literal_column("'%Y-%m-%d'")
+        )
+    else:
+        sql_expr = func.date_format(expr, literal_column("'%Y-%m-01'"))
+    return compiler.process(sql_expr, **kw)
+
+
+def interval_totals(user_id, bucket, goal_id=None, from_=None, to=None):
+    """
+    Aggregate the `daily_goal_totals` rollup, which holds at most one row per goal
+    per day (and thus is much smaller than the `intervals` table).
+
+    Args:
+        user_id (int): the ID of a user
+        bucket (str): one of "day", "week", "month"
+        goal_id (int): if provided, only this goal's time is aggregated
+        from_, to (datetime.datetime): if provided, only the days, which overlap
+            [from_, to), are aggregated
+
+    Returns:
+        (list): dicts of the form
+            {"goal_id": ..., "start": "YYYY-MM-DD", "seconds": ..., "count": ...},
+            where "start" is the first day of the bucket and "count" is the number
+            of intervals, which start within the bucket
+    """
+    bucket_expr = bucket_start(DailyGoalTotal.day, bucket)
+    query = (
+        db.session.query(
+            DailyGoalTotal.goal_id,
+            bucket_expr,
+            func.sum(DailyGoalTotal.seconds),
+            func.sum(DailyGoalTotal.count),
+        )
+        .join(Goal, Goal.id == DailyGoalTotal.goal_id)
+        .filter(Goal.user_id == user_id)
+    )
+    if goal_id is not None:
+        query = query.filter(DailyGoalTotal.goal_id == goal_id)
+    if from_ is not None:
+        query = query.filter(DailyGoalTotal.day >= from_.date())
+    if to is not None:
+        query = query.filter(DailyGoalTotal.day < _first_day_not_before(to))
+    query = query.group_by(DailyGoalTotal.goal_id, bucket_expr).order_by(
+        DailyGoalTotal.goal_id, bucket_expr
+    )
+
+    return [
+        {
+            "goal_id": row_goal_id,
+            "start": row_start,
+            "seconds": int(seconds or 0),
+            "count": int(count or 0),
+        }
+        for row_goal_id, row_start, seconds, count in query
+    ]
+
+
+def _first_day_not_before(dt):
+    if dt.time() == datetime.time():
+        return dt.date()
+    return dt.date() + datetime.timedelta(days=1)
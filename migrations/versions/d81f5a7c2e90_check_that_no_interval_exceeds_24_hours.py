@@ -0,0 +1,50 @@
+"""check that no interval exceeds 24 hours
+
+Revision ID: d81f5a7c2e90
+Revises: a2d6f4e81c35
+Create Date: 2026-10-18 19:40:27.318604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d81f5a7c2e90"
+down_revision = "a2d6f4e81c35"
+branch_labels = None
+depends_on = None
+
+
+# The value of `Interval.MAX_DURATION` (in seconds).
+MAX_DURATION_SECONDS = 24 * 3600
+
+
+def upgrade():
+    # `Interval.overlaps` only looks back `Interval.MAX_DURATION` from the start of
+    # a window, so it would silently miss any longer interval. Such intervals must
+    # be split (or shortened) by hand before upgrading.
+    connection = op.get_bind()
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        duration = "(julianday(final) - julianday(start)) * 86400"
+    elif dialect == "mysql":
+        duration = "TIMESTAMPDIFF(SECOND, start, final)"
+    else:
+        duration = "EXTRACT(EPOCH FROM final - start)"
+    # (Half a second of slack absorbs the rounding of SQLite's Julian days.)
+    n_too_long = connection.execute(
+        sa.text(
+            f"SELECT COUNT(*) FROM intervals WHERE {duration} > :max_seconds + 0.5"
+        ),
+        {"max_seconds": MAX_DURATION_SECONDS},
+    ).scalar()
+    if n_too_long:
+        raise RuntimeError(
+            f"{n_too_long} intervals last longer than 24 hours;"
+            " split them into intervals of at most 24 hours, and then upgrade again."
+        )
+
+
+def downgrade():
+    pass